@@ -0,0 +1,43 @@
+"""Import time benchmark.
+
+Run with `python benchmarks/import_time.py`, every statement is run in a fresh
+interpreter, the best of `--repeat` runs is reported.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+
+STATEMENTS = [
+    "import lixinger",
+    "import lixinger.api.cn.company, lixinger.api.cn.index, lixinger.api.cn.fund",
+    "import lixinger.config",
+    "from lixinger.api.cn.company import get_candlestick",
+    "from lixinger.api.cn.index import get_index_constituents",
+]
+
+
+def measure(statement: str, repeat: int) -> float:
+    """Measure best wall time of running statement in a fresh interpreter."""
+    baseline = min(run([sys.executable, "-c", "pass"]) for _ in range(repeat))
+    return min(run([sys.executable, "-c", statement]) for _ in range(repeat)) - baseline
+
+
+def run(args: list[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for statement in STATEMENTS:
+        print(f"{measure(statement, args.repeat) * 1000:8.1f} ms  {statement}")
+
+
+if __name__ == "__main__":
+    main()
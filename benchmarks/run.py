@@ -0,0 +1,231 @@
+"""Offline benchmark suite.
+
+Run with `python -m benchmarks.run` from the repository root. Every endpoint is
+requested from a local `FakeLixingerServer`, results are stored under
+`benchmarks/results`, and compared with a previous result with `--compare`.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.server import FakeLixingerServer
+from lixinger import client
+from lixinger.api.cn.company.base import get_company
+from lixinger.api.cn.company.candlestick import get_candlestick
+from lixinger.api.cn.company.dividend_and_alloment import (
+    get_dividend_and_alloment,
+)
+from lixinger.api.cn.company.fundamental_non_financial import (
+    get_fundamental_non_financial,
+)
+from lixinger.api.cn.company.pledge import get_pledge
+from lixinger.api.cn.fund.total_net_value import get_total_net_value
+from lixinger.api.cn.index.candlestick import (
+    get_candlestick as get_index_candlestick,
+)
+from lixinger.api.cn.index.constituents import get_index_constituents
+from lixinger.cache import SQLiteCache, set_cache
+from lixinger.config import settings
+from lixinger.endpoint import plan_request_date_range
+from lixinger.utils import get_response_df
+
+RESULTS_DIR = pathlib.Path(__file__).resolve().parent / "results"
+
+ENDPOINTS: dict[str, tuple[Callable, dict[str, any]]] = {
+    "company": (get_company, {}),
+    "candlestick": (
+        get_candlestick,
+        {"type_": "ex_rights", "start_date": "1990-01-01", "stock_code": "600519"},
+    ),
+    "index_candlestick": (
+        get_index_candlestick,
+        {"type_": "normal", "start_date": "1990-01-01", "stock_code": "000300"},
+    ),
+    "fundamental_non_financial": (
+        get_fundamental_non_financial,
+        {
+            "stock_codes": [f"{600000 + i:06d}" for i in range(500)],
+            "metrics_list": ["pe_ttm", "pb", "mc", "dyr"],
+            "date": "2023-06-30",
+        },
+    ),
+    "index_constituents": (get_index_constituents, {"date": "latest"}),
+    "dividend_and_alloment": (
+        get_dividend_and_alloment,
+        {"start_date": "1990-01-01", "stock_code": "600519"},
+    ),
+    "pledge": (get_pledge, {"start_date": "2000-01-01", "stock_code": "600519"}),
+    "total_net_value": (
+        get_total_net_value,
+        {"start_date": "2000-01-01", "stock_code": "161725"},
+    ),
+}
+
+
+def timeit(func: Callable, repeat: int) -> list[float]:
+    """Time every call of func."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings: list[float], **extra: any) -> dict[str, any]:
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        **extra,
+    }
+
+
+def bench_end_to_end(repeat: int) -> dict[str, any]:
+    """End to end latency of every endpoint, with caches cleared."""
+    results = {}
+    for name, (func, kwargs) in ENDPOINTS.items():
+
+        def call() -> None:
+            func.cache_clear()
+            call.rows = len(func(**kwargs))
+
+        results[name] = summarize(timeit(call, repeat), rows=call.rows)
+    return results
+
+
+def bench_parse(repeat: int) -> dict[str, any]:
+    """Rows per second through `get_response_df`, network excluded."""
+    results = {}
+    for name, (func, kwargs) in ENDPOINTS.items():
+        responses = []
+
+        def record(url: str, data=None, json=None, **kw: any) -> any:
+            response = client.get_session().post(url, data=data, json=json, **kw)
+            responses.append(response)
+            return response
+
+        with client.use_transport(record):
+            func.cache_clear()
+            func(**kwargs)
+        output = func.endpoint.output
+        rows = sum(len(response.json()["data"]) for response in responses)
+        timings = timeit(
+            lambda: [get_response_df(response, output) for response in responses],
+            repeat,
+        )
+        results[name] = summarize(
+            timings, rows=rows, rows_per_second=rows / statistics.median(timings)
+        )
+    return results
+
+
+def bench_plan(repeat: int) -> dict[str, any]:
+    """Cost of planning date range windows of a 1990 to today request."""
+    kwargs = {"start_date": "1990-01-01", "stock_code": "000300"}
+    return summarize(timeit(lambda: plan_request_date_range(kwargs), repeat * 100))
+
+
+def bench_cache(repeat: int) -> dict[str, any]:
+    """Latency of in-process and persistent cache hits."""
+    func, kwargs = ENDPOINTS["index_candlestick"]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        set_cache(SQLiteCache(cache_dir))
+        try:
+            func.cache_clear()
+            func(**kwargs)
+            memory = timeit(lambda: func(**kwargs), repeat * 100)
+
+            def persistent() -> None:
+                func.cache_clear()
+                func(**kwargs)
+
+            disk = timeit(persistent, repeat)
+        finally:
+            set_cache(None)
+    return {"memory": summarize(memory), "persistent": summarize(disk)}
+
+
+def get_version() -> str:
+    root = pathlib.Path(__file__).resolve().parents[1]
+    version = "dev"
+    for line in (root / "pyproject.toml").read_text().splitlines():
+        if line.startswith("version"):
+            version = line.split("=")[1].strip().strip('"')
+            break
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return version
+    return f"{version}-{commit}"
+
+
+def compare(
+    results: dict[str, any], baseline: dict[str, any], prefix: str = ""
+) -> None:
+    """Print median latency change against baseline results."""
+    for key, value in results.items():
+        if not isinstance(value, dict) or key not in baseline:
+            continue
+        if "median_ms" in value and "median_ms" in baseline[key]:
+            change = value["median_ms"] / baseline[key]["median_ms"] - 1
+            print(
+                f"{prefix + key:40} {baseline[key]['median_ms']:10.2f} ms "
+                f"-> {value['median_ms']:10.2f} ms  {change:+.1%}"
+            )
+        else:
+            compare(value, baseline[key], prefix=f"{prefix}{key}.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stocks", type=int, default=5000)
+    parser.add_argument("--indices", type=int, default=100)
+    parser.add_argument("--constituents", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0, help="server latency")
+    parser.add_argument("--compare", type=pathlib.Path, help="baseline result file")
+    args = parser.parse_args()
+
+    size = {
+        "stocks": args.stocks,
+        "indices": args.indices,
+        "constituents": args.constituents,
+    }
+    with FakeLixingerServer(size=size, latency=args.latency) as server:
+        settings.base_url = server.base_url
+        settings.rate_limit = 0
+        settings.cache_dir = ""
+        results = {
+            "version": get_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "size": size,
+            "end_to_end": bench_end_to_end(args.repeat),
+            "parse": bench_parse(args.repeat),
+            "plan": bench_plan(args.repeat),
+            "cache": bench_cache(args.repeat),
+        }
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    path = RESULTS_DIR / f"{results['version']}.json"
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False))
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    print(f"Results are saved to {path}")
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Local stand-in Lixinger server producing synthetic payloads.
+
+Payload sizes follow the request: one row per business day of the requested
+date range for time series, one row per stock and date for fundamentals, and
+`constituents` stocks per index for index constituents.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+DATETIME_FORMAT = "%Y-%m-%dT00:00:00+08:00"
+
+
+def get_dates(payload: dict[str, any]) -> pd.DatetimeIndex:
+    if "startDate" not in payload:
+        date = payload.get("date", "latest")
+        return pd.DatetimeIndex([pd.Timestamp("today" if date == "latest" else date)])
+    dates = pd.bdate_range(
+        max(pd.Timestamp(payload["startDate"]), pd.Timestamp("1990-12-19")),
+        payload.get("endDate") or pd.Timestamp("today").normalize(),
+    )[::-1]
+    if payload.get("limit"):
+        dates = dates[: payload["limit"]]
+    return dates
+
+
+def candlestick(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    dates = get_dates(payload)
+    rng = np.random.default_rng(len(dates))
+    close = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return [
+        {
+            "date": date.strftime(DATETIME_FORMAT),
+            "open": round(c * 0.99, 2),
+            "high": round(c * 1.02, 2),
+            "low": round(c * 0.98, 2),
+            "close": round(c, 2),
+            "volume": int(c * 1e5),
+            "amount": int(c * 1e7),
+            "change": round(rng.normal(0, 0.02), 4),
+        }
+        for date, c in zip(dates, close)
+    ]
+
+
+def fundamental(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    rows = []
+    for date in get_dates(payload):
+        for stock_code in payload.get("stockCodes") or []:
+            row = {"date": date.strftime(DATETIME_FORMAT), "stockCode": stock_code}
+            for metric in payload.get("metricsList") or []:
+                node = row
+                *parents, leaf = metric.split(".")
+                for parent in parents:
+                    node = node.setdefault(parent, {})
+                node[leaf] = 12.34
+            rows.append(row)
+    return rows
+
+
+def constituents(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    index_codes = payload.get("stockCodes") or [
+        f"{i:06d}" for i in range(size["indices"])
+    ]
+    # Constituents are rebalanced quarterly, one stock is replaced each time.
+    offset = get_dates(payload)[0].quarter
+    return [
+        {
+            "stockCode": index_code,
+            "constituents": [
+                {"stockCode": f"{600000 + i:06d}", "areaCode": "cn", "market": "a"}
+                for i in range(offset, offset + size["constituents"])
+            ],
+        }
+        for index_code in index_codes
+    ]
+
+
+def dividend(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    return [
+        {
+            "date": date.strftime(DATETIME_FORMAT),
+            "bonusSharesFromProfit": 0,
+            "bonusSharesFromCapitalReserve": 0,
+            "dividend": 1.5,
+            "content": "10派15元",
+            "registerDate": date.strftime(DATETIME_FORMAT),
+            "exDate": date.strftime(DATETIME_FORMAT),
+            "paymentDate": date.strftime(DATETIME_FORMAT),
+            "status": "implemented",
+            "originalValue": 1.5,
+            "splitRatio": 1,
+        }
+        for date in get_dates(payload)[::250]
+    ]
+
+
+def pledge(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    return [
+        {
+            "date": date.strftime(DATETIME_FORMAT),
+            "pledgor": "股东",
+            "pledgee": "银行",
+            "pledgeMatters": "质押",
+            "pledgeSharesNature": "流通股",
+            "pledgeAmount": 1e6,
+            "pledgePercentageOfTotalEquity": 0.01,
+            "pledgeStartDate": date.strftime(DATETIME_FORMAT),
+            "pledgeEndDate": None,
+            "pledgeDischargeDate": None,
+            "pledgeDischargeExplanation": None,
+            "pledgeDischargeAmount": None,
+            "isPledgeRepurchaseTransactions": False,
+            "accumulatedPledgePercentageOfTotalEquity": 0.05,
+        }
+        for date in get_dates(payload)[::20]
+    ]
+
+
+def net_value(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    dates = get_dates(payload)
+    return [
+        {"date": date.strftime(DATETIME_FORMAT), "totalNetValue": 1 + i / 1000}
+        for i, date in enumerate(dates)
+    ]
+
+
+def industries(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    code = int(payload["stockCode"]) % 30
+    return [
+        {"areaCode": "cn", "stockCode": f"{340000 + code}", "source": "sw"},
+        {"areaCode": "cn", "stockCode": f"{480000 + code}", "source": "sw_2021"},
+    ]
+
+
+def company(payload: dict[str, any], size: dict[str, int]) -> list[dict]:
+    stock_codes = payload.get("stockCodes") or [
+        f"{600000 + i:06d}" for i in range(size["stocks"])
+    ]
+    return [
+        {
+            "name": f"公司{stock_code}",
+            "stockCode": stock_code,
+            "areaCode": "cn",
+            "market": "a",
+            "fsType": "non_financial",
+            "mutualMarkets": ["ha"],
+            "ipoDate": "2001-08-26T16:00:00.000Z",
+        }
+        for stock_code in stock_codes
+    ]
+
+
+GENERATORS = {
+    "/api/cn/company": company,
+    "/api/cn/company/candlestick": candlestick,
+    "/api/cn/company/fundamental/non_financial": fundamental,
+    "/api/cn/company/dividend-and-alloment": dividend,
+    "/api/cn/company/industries": industries,
+    "/api/cn/company/pledge": pledge,
+    "/api/cn/index/candlestick": candlestick,
+    "/api/cn/index/fundamental": fundamental,
+    "/api/cn/index/constituents": constituents,
+    "/api/cn/fund/total-net-value": net_value,
+}
+
+DEFAULT_SIZE = {"stocks": 5000, "indices": 100, "constituents": 300}
+
+
+class FakeLixingerServer(ThreadingHTTPServer):
+    """Fake Lixinger server, listening on a random local port by default.
+
+    Example:
+        >>> with FakeLixingerServer() as server:
+        ...     settings.base_url = server.base_url
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, port: int = 0, size: dict[str, int] | None = None, latency: float = 0
+    ) -> None:
+        super().__init__(("127.0.0.1", port), Handler)
+        self.size = {**DEFAULT_SIZE, **(size or {})}
+        self.latency = latency
+        self.requests = 0
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/api"
+
+    def __enter__(self) -> FakeLixingerServer:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args: any) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        server: FakeLixingerServer = self.server
+        server.requests += 1
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        generator = GENERATORS.get(self.path)
+        if generator is None:
+            body = {"code": 0, "error": f"unknown path {self.path}"}
+        else:
+            body = {"code": 1, "data": generator(payload, server.size)}
+        content = json.dumps(body).encode()
+        if server.latency:
+            threading.Event().wait(server.latency)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            content = gzip.compress(content, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: any) -> None:
+        pass
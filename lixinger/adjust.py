@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from lixinger.api.cn.company.candlestick import get_candlestick
+from lixinger.api.cn.company.dividend_and_alloment import (
+    get_dividend_and_alloment,
+)
+
+PRICE_COLUMNS = ["open", "high", "low", "close"]
+
+AdjustType = Literal["lxr_fc_rights", "fc_rights", "bc_rights"]
+
+
+class AdjustmentEngine:
+    """Adjust prices of one stock locally, from ex-rights bars and dividends.
+
+    Every ex-rights event maps prices before it to prices after it. For
+    `lxr_fc_rights` the map is proportional, scaling prices by the ratio of
+    the ex-rights reference price to the previous close, while `fc_rights`
+    and `bc_rights` subtract the cash dividend and divide by the share ratio.
+    Maps are composed with cumulative products and sums, so any anchor date
+    is adjusted in one vectorized pass. Cash dividends are per share, bonus
+    shares per 10 shares.
+
+    Example:
+        >>> engine = AdjustmentEngine.fetch("600519")
+        >>> engine.adjust("fc_rights", adjust_forward_date="2020-01-02")
+        >>> engine.validate("bc_rights")
+    """
+
+    def __init__(
+        self, stock_code: str, candlestick: pd.DataFrame, dividends: pd.DataFrame
+    ) -> None:
+        self.stock_code = stock_code
+        self.candlestick = candlestick.sort_values(by="date").reset_index(drop=True)
+        self.events = get_events(dividends)
+
+    @classmethod
+    def fetch(
+        cls,
+        stock_code: str,
+        start_date: str = "1990-01-01",
+        end_date: str | None = None,
+    ) -> AdjustmentEngine:
+        """Fetch ex-rights bars and dividends once, to adjust them locally."""
+        candlestick = get_candlestick(
+            type_="ex_rights",
+            start_date=start_date,
+            end_date=end_date,
+            stock_code=stock_code,
+        )
+        dividends = get_dividend_and_alloment(
+            start_date=start_date, end_date=end_date, stock_code=stock_code
+        )
+        return cls(stock_code, candlestick, dividends)
+
+    def adjust(
+        self,
+        type_: AdjustType,
+        adjust_forward_date: str | None = None,
+        adjust_backward_date: str | None = None,
+    ) -> pd.DataFrame:
+        """Get adjusted bars, like `get_candlestick` of the same type.
+
+        Forward adjusted prices are anchored to `adjust_forward_date`, the last
+        bar by default, backward adjusted prices to `adjust_backward_date`, the
+        first bar by default.
+        """
+        df = self.candlestick.copy()
+        dates = df["date"].to_numpy()
+        if df.empty:
+            return df
+        ex_dates = self.events["ex_date"].to_numpy()
+        dividend = self.events["dividend"].to_numpy()
+        ratio = self.events["share_ratio"].to_numpy()
+
+        if type_ == "lxr_fc_rights":
+            previous = np.searchsorted(dates, ex_dates, side="left") - 1
+            close = df["close"].to_numpy()[np.maximum(previous, 0)]
+            scale = np.where(previous >= 0, (close - dividend) / ratio / close, 1.0)
+            shift = np.zeros_like(scale)
+        else:
+            scale = 1 / ratio
+            shift = -dividend / ratio
+
+        # Event k maps price p to scale[k] * p + shift[k], composed from the
+        # first event the maps are cum_scale[k] * p + cum_shift[k].
+        cum_scale = np.concatenate([[1.0], np.cumprod(scale)])
+        cum_shift = np.concatenate(
+            [[0.0], cum_scale[1:] * np.cumsum(shift / np.cumprod(scale))]
+        )
+
+        if type_ == "bc_rights":
+            anchor = pd.Timestamp(adjust_backward_date or dates[0])
+        else:
+            anchor = pd.Timestamp(adjust_forward_date or dates[-1])
+        k = np.searchsorted(ex_dates, anchor.to_datetime64(), side="right")
+        j = np.searchsorted(ex_dates, dates, side="right")
+        factor = cum_scale[k] / cum_scale[j]
+        for column in PRICE_COLUMNS:
+            df[column] = factor * (df[column].to_numpy() - cum_shift[j]) + cum_shift[k]
+        return df
+
+    def validate(
+        self,
+        type_: AdjustType,
+        adjust_forward_date: str | None = None,
+        adjust_backward_date: str | None = None,
+    ) -> float:
+        """Get max relative error of local prices against the server's."""
+        local = self.adjust(type_, adjust_forward_date, adjust_backward_date)
+        if type_ == "bc_rights":
+            adjust_backward_date = adjust_backward_date or local["date"].iloc[0]
+        else:
+            adjust_forward_date = adjust_forward_date or local["date"].iloc[-1]
+        server = get_candlestick(
+            type_=type_,
+            start_date=local["date"].iloc[0].strftime("%Y-%m-%d"),
+            end_date=local["date"].iloc[-1].strftime("%Y-%m-%d"),
+            stock_code=self.stock_code,
+            adjust_forward_date=format_date(adjust_forward_date),
+            adjust_backward_date=format_date(adjust_backward_date),
+        )
+        merged = local.merge(server, on="date", suffixes=("", "_server"))
+        errors = [
+            np.abs(merged[column] / merged[f"{column}_server"] - 1).max()
+            for column in PRICE_COLUMNS
+        ]
+        return float(max(errors))
+
+
+def get_events(dividends: pd.DataFrame) -> pd.DataFrame:
+    """Get ex-rights events from dividends, one row per ex-date."""
+    df = dividends[dividends["ex_date"].notna()]
+    shares = (
+        df["bonus_shares_from_profit"].fillna(0)
+        + df["bonus_shares_from_capital_reserve"].fillna(0)
+    ) / 10
+    events = pd.DataFrame(
+        {
+            "ex_date": df["ex_date"].dt.normalize(),
+            "dividend": df["dividend"].fillna(0).astype(float),
+            "share_ratio": (1 + shares) * df["split_ratio"].fillna(1),
+        }
+    )
+    return (
+        events.groupby("ex_date", as_index=False)
+        .agg({"dividend": "sum", "share_ratio": "prod"})
+        .sort_values(by="ex_date", ignore_index=True)
+    )
+
+
+def format_date(date: str | pd.Timestamp | None) -> str | None:
+    return None if date is None else pd.Timestamp(date).strftime("%Y-%m-%d")
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import time
+import weakref
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from tenacity import retry, retry_if_exception
+
+from lixinger import client, metrics
+from lixinger.cache import make_cache_key
+from lixinger.config import settings
+from lixinger.ratelimit import RateLimitError, get_rate_limiter
+from lixinger.singleflight import AsyncSingleFlight
+
+if TYPE_CHECKING:
+    import httpx
+
+_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+_single_flights: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class PreparedRequest(Exception):
+    """Raised instead of sending the request while preparing it."""
+
+    def __init__(self, url: str, json: any) -> None:
+        super().__init__(url)
+        self.url = url
+        self.json = json
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get async client of running event loop."""
+    try:
+        import httpx
+    except ImportError as e:  # pragma: no cover
+        raise ImportError(
+            "httpx is required for asyncio support, "
+            "install it with `pip install lixinger[aio]`"
+        ) from e
+    loop = asyncio.get_running_loop()
+    if loop not in _clients:
+        _clients[loop] = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.aio_max_concurrency,
+                max_keepalive_connections=settings.aio_max_concurrency,
+            ),
+        )
+    return _clients[loop]
+
+
+def get_semaphore() -> asyncio.Semaphore:
+    """Get semaphore bounding concurrent requests of running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _semaphores:
+        _semaphores[loop] = asyncio.Semaphore(settings.aio_max_concurrency)
+    return _semaphores[loop]
+
+
+def get_single_flight() -> AsyncSingleFlight:
+    """Get single flight of running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _single_flights:
+        _single_flights[loop] = AsyncSingleFlight()
+    return _single_flights[loop]
+
+
+async def close_client() -> None:
+    """Close async client of running event loop."""
+    _client = _clients.pop(asyncio.get_running_loop(), None)
+    if _client is not None:
+        await _client.aclose()
+
+
+async def post(url: str, json=None, **kwargs: any) -> httpx.Response:
+    """Post request, concurrent identical requests are sent only once."""
+    key = make_cache_key(url, {"data": None, "json": json})
+    response, shared = await get_single_flight().do(
+        key, lambda: send(url, json=json, **kwargs)
+    )
+    if shared:
+        metrics.emit("coalesced", client.get_endpoint(url))
+    return response
+
+
+def is_transient(exception: BaseException) -> bool:
+    """Check if exception is a transient network, server or rate limit error."""
+    import httpx
+
+    return isinstance(
+        exception,
+        (
+            httpx.TimeoutException,
+            httpx.NetworkError,
+            httpx.RemoteProtocolError,
+            client.ServerError,
+            RateLimitError,
+        ),
+    )
+
+
+def get_timeout(url: str) -> httpx.Timeout:
+    import httpx
+
+    connect_timeout, read_timeout = client.get_timeout(url)
+    return httpx.Timeout(read_timeout, connect=connect_timeout)
+
+
+@retry(
+    stop=client.stop_retrying,
+    wait=client.wait_backoff,
+    retry=retry_if_exception(is_transient),
+    before_sleep=client.record_retry,
+)
+async def send(url: str, json=None, **kwargs: any) -> httpx.Response:
+    """Send request with timeouts, retry on transient errors, maybe hedged."""
+    kwargs.setdefault("timeout", get_timeout(url))
+    delay = client.get_hedge_delay(url)
+    if delay is None:
+        return await send_once(url, json=json, **kwargs)
+    return await hedge(lambda: send_once(url, json=json, **kwargs), delay, url)
+
+
+async def send_once(url: str, json=None, **kwargs: any) -> httpx.Response:
+    async with get_semaphore():
+        rate_limiter = get_rate_limiter()
+        if rate_limiter is not None:
+            await asyncio.sleep(rate_limiter.reserve())
+        start = time.perf_counter()
+        response = await get_client().post(url, json=json, **kwargs)
+    client.record_response(url, response, time.perf_counter() - start)
+    client.check_rate_limit(response)
+    client.check_server_error(response)
+    return response
+
+
+async def hedge(
+    func: Callable[[], Awaitable[httpx.Response]], delay: float, url: str
+) -> httpx.Response:
+    """Await func, await it again if it's not done after delay, take the first.
+
+    The first successful response is returned, or the exception of the first
+    call if both of them failed. The slower call is cancelled.
+    """
+    tasks = [asyncio.ensure_future(func())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            metrics.emit("hedge", client.get_endpoint(url))
+            tasks.append(asyncio.ensure_future(func()))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in tasks:
+                if task in done and task.exception() is None:
+                    return task.result()
+        return tasks[0].result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def request(func: Callable, *args: any, **kwargs: any) -> any:
+    """Call api function with its request sent by async client.
+
+    The function is called twice, first to prepare the request, then to
+    parse the response, so payload building and parsing are shared with the
+    blocking api. If a transport is used, e.g. by a cassette, the request is
+    sent by it in the default executor.
+    """
+
+    def prepare(url: str, data=None, json=None, **_: any) -> None:
+        raise PreparedRequest(url, json)
+
+    transport = client.get_transport()
+    try:
+        with client.use_transport(prepare):
+            func(*args, **kwargs)
+    except PreparedRequest as e:
+        prepared = e
+    else:
+        raise RuntimeError(f"{func.__name__} did not send any request")
+
+    if transport is None:
+        response = await post(prepared.url, json=prepared.json)
+    else:
+        response = await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(
+                contextvars.copy_context().run,
+                transport,
+                prepared.url,
+                json=prepared.json,
+            ),
+        )
+    with client.use_transport(lambda *_, **__: response):
+        return func(*args, **kwargs)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+
+from lixinger.api.cn.fund.total_net_value import get_total_net_value
+from lixinger.api.cn.index.candlestick import get_candlestick
+from lixinger.batch import fetch_panel
+
+GRANULARITY_MONTHS = {"m": 1, "q": 3, "hy": 6, "y": 12}
+
+
+def load_prices(
+    codes: list[str],
+    start_date: str,
+    end_date: str | None = None,
+    kind: Literal["index", "fund"] = "index",
+) -> pd.DataFrame:
+    """Load close prices of indices, or net values of funds, as date x code.
+
+    Series are requested concurrently, and served by the caches if enabled.
+    """
+    if kind == "index":
+        panel = fetch_panel(
+            get_candlestick,
+            codes,
+            type_="normal",
+            start_date=start_date,
+            end_date=end_date,
+        )
+        value = "close"
+    else:
+        panel = fetch_panel(
+            get_total_net_value, codes, start_date=start_date, end_date=end_date
+        )
+        value = "total_net_value"
+    if panel.attrs["errors"]:
+        stock_code, error = next(iter(panel.attrs["errors"].items()))
+        raise ValueError(f"failed to load prices of {stock_code}") from error
+    prices = panel.pivot_table(index="date", columns="stock_code", values=value)
+    return prices.reindex(columns=codes)
+
+
+def sparse_table_max(values: np.ndarray, levels: int) -> list[np.ndarray]:
+    """Maxima of rows [i, i + 2**k) of levels k <= `levels`, ignoring NaN."""
+    table = [values]
+    width = 1
+    while len(table) <= levels:
+        previous = table[-1]
+        table.append(np.fmax(previous[:-width], previous[width:]))
+        width *= 2
+    return table
+
+
+def rolling_max(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Maxima of rows [starts[i], i] of 2-D values, for every row i."""
+    ends = np.arange(len(values))
+    levels = np.log2(ends - starts + 1).astype(int)
+    table = sparse_table_max(values, levels.max(initial=0))
+    result = np.empty_like(values, dtype=float)
+    for level in np.unique(levels):
+        rows = levels == level
+        left = table[level][starts[rows]]
+        right = table[level][ends[rows] - 2**level + 1]
+        result[rows] = np.fmax(left, right)
+    return result
+
+
+def drawdown(
+    prices: pd.DataFrame, granularity: Literal["m", "q", "hy", "y"]
+) -> pd.DataFrame:
+    """Drawdown of every date from the highest price of the trailing period.
+
+    The trailing period is a month, quarter, half year or year, by the same
+    granularity as `get_index_drawdown`, computed for all codes at once.
+    """
+    dates = pd.DatetimeIndex(prices.index)
+    offset = pd.DateOffset(months=GRANULARITY_MONTHS[granularity])
+    starts = np.searchsorted(dates, dates - offset, side="left")
+    values = prices.to_numpy(dtype=float)
+    peaks = rolling_max(values, starts)
+    return pd.DataFrame(values / peaks - 1, index=prices.index, columns=prices.columns)
+
+
+def max_drawdown(prices: pd.DataFrame) -> pd.DataFrame:
+    """Max drawdown of every code, with its peak, trough and recovery dates.
+
+    Recovery date is NaT if the price has not recovered to the peak yet.
+    """
+    values = prices.to_numpy(dtype=float)
+    filled = np.where(np.isnan(values), -np.inf, values)
+    peaks = np.maximum.accumulate(filled, axis=0)
+    drawdowns = np.where(np.isnan(values), np.nan, values / peaks - 1)
+    valid = ~np.all(np.isnan(drawdowns), axis=0)
+    rows = np.arange(len(values))[:, None]
+    columns = np.arange(values.shape[1])
+
+    troughs = np.nanargmin(np.where(np.isnan(drawdowns), np.inf, drawdowns), axis=0)
+    peak_values = peaks[troughs, columns]
+    peak_rows = np.argmax((filled == peak_values) & (rows <= troughs), axis=0)
+    recovered = (filled >= peak_values) & (rows > troughs)
+    recovery_rows = np.where(recovered.any(axis=0), np.argmax(recovered, axis=0), -1)
+
+    dates = pd.DatetimeIndex(prices.index)
+    result = pd.DataFrame(
+        {
+            "max_drawdown": drawdowns[troughs, columns],
+            "peak_date": dates[peak_rows],
+            "trough_date": dates[troughs],
+            "recovery_date": dates[recovery_rows].where(recovery_rows >= 0),
+        },
+        index=prices.columns,
+    )
+    result.loc[~valid] = np.nan
+    return result
+
+
+def period_returns(prices: pd.DataFrame, freq: str = "M") -> pd.DataFrame:
+    """Returns of every period, from the last price of the previous period.
+
+    The first period returns from the first price. Missing prices are filled
+    by the last valid ones.
+    """
+    values = prices.to_numpy(dtype=float)
+    columns = np.arange(values.shape[1])
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    filled = values[np.maximum.accumulate(rows, axis=0), columns]
+
+    periods = pd.DatetimeIndex(prices.index).to_period(freq)
+    ends = np.flatnonzero(np.append(periods[1:] != periods[:-1], True))
+    end_values = filled[ends]
+    first_values = values[np.argmax(~np.isnan(values), axis=0), columns]
+    previous = np.vstack([first_values, end_values[:-1]])
+    previous = np.where(np.isnan(previous), first_values, previous)
+    return pd.DataFrame(
+        end_values / previous - 1, index=periods[ends], columns=prices.columns
+    )
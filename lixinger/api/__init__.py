@@ -0,0 +1,11 @@
+from lixinger.lazy import lazy_getattr
+
+_attributes = {
+    "cn": "cn",
+    "hk": "hk",
+    "macro": "macro",
+    "us": "us",
+}
+
+__all__ = list(_attributes)
+__getattr__ = lazy_getattr(__name__, _attributes)
@@ -0,0 +1,10 @@
+from lixinger.lazy import lazy_getattr
+
+_attributes = {
+    "company": "company",
+    "fund": "fund",
+    "index": "index",
+}
+
+__all__ = list(_attributes)
+__getattr__ = lazy_getattr(__name__, _attributes)
@@ -0,0 +1,19 @@
+from lixinger.lazy import lazy_getattr
+
+_attributes = {
+    "get_company": "base",
+    "get_block_deal": "block_deal",
+    "get_candlestick": "candlestick",
+    "get_dividend_and_alloment": "dividend_and_alloment",
+    "get_equity_change": "equity_change",
+    "get_fundamental_non_financial": "fundamental_non_financial",
+    "get_fundamental_statistics": "fundamental_statistics",
+    "get_indices": "indices",
+    "get_industries": "industries",
+    "get_pledge": "pledge",
+    "get_senior_executive_shares_change": "senior_executive_shares_change",
+    "get_shareholders_num": "shareholders_num",
+}
+
+__all__ = list(_attributes)
+__getattr__ = lazy_getattr(__name__, _attributes)
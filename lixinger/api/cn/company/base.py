@@ -6,7 +6,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, convert_column_list_to_str, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -55,7 +56,5 @@ def get_company(
     df = get_response_df(response, Output)
 
     if "mutual_markets" in df.columns:
-        df["mutual_markets"] = [
-            convert_column_list_to_str(column) for column in df["mutual_markets"]
-        ]
+        df["mutual_markets"] = df["mutual_markets"].str.join(",")
     return df
@@ -6,7 +6,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -20,7 +21,7 @@ class Output(pa.DataFrameModel):
     change: pa.typing.Series[float]
 
 
-@api
+@api(subset=True)
 def get_candlestick(
     type_: Literal["ex_rights", "lxr_fc_rights", "fc_rights", "bc_rights"],
     start_date: str,
@@ -4,7 +4,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -4,7 +4,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -12,7 +13,7 @@ class Output(pa.DataFrameModel):
     stock_code: pa.typing.Series[str]
 
 
-@api
+@api(chunks={"stock_codes": 100, "metrics_list": 48}, subset=True)
 def get_fundamental_non_financial(
     stock_codes: list[str],
     metrics_list: list[str],
@@ -6,7 +6,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -14,7 +15,7 @@ class Output(pa.DataFrameModel):
     stock_code: pa.typing.Series[str]
 
 
-@api
+@api(chunks={"stock_codes": 100, "metrics_list": 48})
 def get_fundamental_statistics(
     stock_codes: list[str],
     metrics_list: list[str],
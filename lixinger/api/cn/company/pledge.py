@@ -4,7 +4,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -50,7 +51,7 @@ def get_pledge(
         payload["limit"] = limit
 
     response = client.post(
-        f"{settings.base_url}/cn/company/block-deal",
+        f"{settings.base_url}/cn/company/pledge",
         json=payload,
     )
     df = get_response_df(response, Output)
@@ -0,0 +1,9 @@
+from lixinger.lazy import lazy_getattr
+
+_attributes = {
+    "get_exchange_traded_close_price": "exchange_traded_close_price",
+    "get_total_net_value": "total_net_value",
+}
+
+__all__ = list(_attributes)
+__getattr__ = lazy_getattr(__name__, _attributes)
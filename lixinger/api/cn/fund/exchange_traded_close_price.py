@@ -4,7 +4,8 @@ import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
@@ -15,7 +16,7 @@ class Output(pa.DataFrameModel):
     close: pa.typing.Series[float]
 
 
-@api
+@api(subset=True)
 def get_exchange_traded_close_price(
     start_date: str,
     stock_code: str,
@@ -0,0 +1,12 @@
+from lixinger.lazy import lazy_getattr
+
+_attributes = {
+    "get_index": "base",
+    "get_candlestick": "candlestick",
+    "get_index_constituents": "constituents",
+    "get_index_drawdown": "drawdown",
+    "get_index_fundamental": "fundamental",
+}
+
+__all__ = list(_attributes)
+__getattr__ = lazy_getattr(__name__, _attributes)
@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-import pandas as pd
 import pandera as pa
 
 from lixinger import client
 from lixinger.config import settings
-from lixinger.utils import api, get_response_df, set_column_snake_case
+from lixinger.endpoint import api
+from lixinger.utils import get_response_df
 
 
 class Output(pa.DataFrameModel):
     index_code: pa.typing.Series[str]
     stock_code: pa.typing.Series[str]
-    aera_code: pa.typing.Series[str]
+    area_code: pa.typing.Series[str]
     market: pa.typing.Series[str]
 
 
@@ -34,14 +34,9 @@ def get_index_constituents(
         f"{settings.base_url}/cn/index/constituents",
         json=payload,
     )
-    df = get_response_df(response, Output)
-    del df["index_code"]
-    del df["market"]
-    del df["aera_code"]
-    df = df.explode("constituents")
-    df = pd.concat(
-        [df.drop(["constituents"], axis=1), df["constituents"].apply(pd.Series)], axis=1
+    return get_response_df(
+        response,
+        Output,
+        record_path="constituents",
+        meta={"stockCode": "indexCode"},
     )
-    df.rename(columns={"stock_code": "index_code"}, inplace=True)
-    df = set_column_snake_case(df)
-    return df
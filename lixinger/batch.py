@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+import pathlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Literal
+
+import pandas as pd
+
+from lixinger.config import settings
+from lixinger.endpoint import submit
+
+
+def iter_stocks(
+    func: Callable,
+    stock_codes: list[str],
+    max_workers: int | None = None,
+    **kwargs: any,
+) -> Iterator[tuple[str, pd.DataFrame | Exception]]:
+    """Call single stock api function for every stock, in a bounded pool.
+
+    Yield stock code and its result in order, or the exception it raised, so
+    one failed stock doesn't fail the others. At most `max_workers` stocks,
+    defaults to `max_workers` setting, are requested or kept at a time.
+    """
+    max_workers = max_workers or settings.max_workers
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = deque()
+        try:
+            for stock_code in stock_codes:
+                futures.append(
+                    (
+                        stock_code,
+                        submit(executor, func, stock_code=stock_code, **kwargs),
+                    )
+                )
+                if len(futures) >= max_workers:
+                    stock_code, future = futures.popleft()
+                    yield stock_code, future.exception() or future.result()
+            while futures:
+                stock_code, future = futures.popleft()
+                yield stock_code, future.exception() or future.result()
+        finally:
+            for _, future in futures:
+                future.cancel()
+
+
+def fetch_panel(
+    func: Callable,
+    stock_codes: list[str],
+    max_workers: int | None = None,
+    **kwargs: any,
+) -> pd.DataFrame:
+    """Get long format panel of single stock api function for many stocks.
+
+    Exceptions of failed stocks are kept in `errors` of the panel attrs.
+
+    Example:
+        >>> from lixinger.api.cn.company.candlestick import get_candlestick
+        >>> panel = fetch_panel(
+        ...     get_candlestick,
+        ...     ["600519", "000001"],
+        ...     type_="ex_rights",
+        ...     start_date="2010-01-01",
+        ... )
+    """
+    dfs = []
+    errors = {}
+    for stock_code, result in iter_stocks(func, stock_codes, max_workers, **kwargs):
+        if isinstance(result, Exception):
+            errors[stock_code] = result
+        else:
+            dfs.append(result.assign(stock_code=stock_code))
+    if dfs:
+        panel = pd.concat(dfs, ignore_index=True)
+    else:
+        panel = pd.DataFrame(columns=["stock_code"])
+    panel = panel[["stock_code", *panel.columns.drop("stock_code")]]
+    panel.attrs["errors"] = errors
+    return panel
+
+
+def fetch_partitions(
+    func: Callable,
+    stock_codes: list[str],
+    directory: str | os.PathLike,
+    format: Literal["pickle", "parquet", "csv"] = "pickle",
+    max_workers: int | None = None,
+    **kwargs: any,
+) -> pd.DataFrame:
+    """Write result of single stock api function for many stocks to files.
+
+    Every stock is written to `<directory>/<stock_code>.<format>` as soon as
+    it arrives, so the whole panel is never kept in memory. Return a manifest
+    with path, rows and error of every stock.
+    """
+    directory = pathlib.Path(directory).expanduser()
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = {"pickle": "pkl", "parquet": "parquet", "csv": "csv"}[format]
+    manifest = []
+    for stock_code, result in iter_stocks(func, stock_codes, max_workers, **kwargs):
+        if isinstance(result, Exception):
+            manifest.append((stock_code, None, 0, result))
+            continue
+        path = directory / f"{stock_code}.{suffix}"
+        if format == "csv":
+            result.to_csv(path, index=False)
+        else:
+            getattr(result, f"to_{format}")(path)
+        manifest.append((stock_code, path, len(result), None))
+    return pd.DataFrame(manifest, columns=["stock_code", "path", "rows", "error"])
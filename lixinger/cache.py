@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from typing import Tuple
+
+import pandas as pd
+
+from lixinger.config import settings
+
+
+def make_cache_key(endpoint: str, params: dict[str, any]) -> str:
+    """Make cache key from endpoint and canonicalized request params."""
+    return "{}:{}".format(
+        endpoint,
+        json.dumps(params, sort_keys=True, separators=(",", ":"), default=str),
+    )
+
+
+def is_immutable(params: dict[str, any]) -> bool:
+    """Check whether the result of a request will never change.
+
+    A request is immutable when it ends at a past date, and its prices are
+    not forward adjusted to the latest trading day.
+    """
+    end_date = params.get("end_date") or params.get("date")
+    if end_date is None or end_date == "latest":
+        return False
+    if is_forward_adjusted(params):
+        return False
+    return pd.Timestamp(end_date) < pd.Timestamp("today").normalize()
+
+
+def is_forward_adjusted(params: dict[str, any]) -> bool:
+    """Check whether prices are forward adjusted to the latest trading day."""
+    return (
+        params.get("type_") in ("lxr_fc_rights", "fc_rights")
+        and params.get("adjust_forward_date") is None
+    )
+
+
+class BaseCache:
+    """Base class of persistent cache."""
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        raise NotImplementedError
+
+    def set(self, key: str, value: pd.DataFrame, ttl: float | None = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+class SQLiteCache(BaseCache):
+    """Persistent cache with sqlite index and pickled dataframe payloads."""
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = pathlib.Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.sqlite"
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, file TEXT NOT NULL, "
+                "created REAL NOT NULL, expires REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.index_path, timeout=30)
+
+    def _payload_path(self, key: str) -> pathlib.Path:
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.pkl"
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT file, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        file, expires = row
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return None
+        try:
+            return pd.read_pickle(self.directory / file)
+        except FileNotFoundError:
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: pd.DataFrame, ttl: float | None = None) -> None:
+        path = self._payload_path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        value.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, path.name, now, None if ttl is None else now + ttl),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._payload_path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+        for path in self.directory.glob("*.pkl"):
+            path.unlink(missing_ok=True)
+
+
+Interval = Tuple[pd.Timestamp, pd.Timestamp]
+
+ONE_DAY = pd.Timedelta(days=1)
+
+
+def subtract_intervals(
+    intervals: list[Interval], start: pd.Timestamp, end: pd.Timestamp
+) -> list[Interval]:
+    """Get gaps of sorted `intervals` between start and end, days inclusive."""
+    gaps = []
+    cursor = start
+    for interval_start, interval_end in intervals:
+        if interval_end < cursor:
+            continue
+        if interval_start > end:
+            break
+        if interval_start > cursor:
+            gaps.append((cursor, interval_start - ONE_DAY))
+        cursor = interval_end + ONE_DAY
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge_intervals(
+    intervals: list[Interval], start: pd.Timestamp, end: pd.Timestamp
+) -> list[Interval]:
+    """Add interval to sorted `intervals`, merging overlapping and adjacent ones."""
+    merged = []
+    for interval_start, interval_end in sorted([*intervals, (start, end)]):
+        if merged and interval_start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], interval_end))
+        else:
+            merged.append((interval_start, interval_end))
+    return merged
+
+
+class SubsetCache:
+    """Cache at (endpoint, stock_code, metric, date range) granularity.
+
+    Rows of every stock are kept by date, along with the date ranges covered
+    by every metric, so a query is served from any overlapping results, and
+    only its missing stocks, metrics and date gaps need to be requested.
+    Endpoints without metrics cover all columns with the `*` metric.
+    With `directory`, rows and coverage of every stock are also pickled to
+    one file, loaded on first access, so they survive process restarts.
+    """
+
+    def __init__(self, directory: str | os.PathLike | None = None) -> None:
+        self.directory = pathlib.Path(directory).expanduser() if directory else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._rows: dict[tuple[str, str], pd.DataFrame] = {}
+        self._coverage: dict[tuple[str, str], dict[str, list[Interval]]] = {}
+        self._loaded: set[tuple[str, str]] = set()
+
+    def _path(self, key: str, stock_code: str) -> pathlib.Path:
+        name = hashlib.sha256(f"{key}:{stock_code}".encode()).hexdigest()
+        return self.directory / f"{name}.pkl"
+
+    def _load(self, key: str, stock_code: str) -> None:
+        """Load rows and coverage of stock from directory, once, under lock."""
+        if self.directory is None or (key, stock_code) in self._loaded:
+            return
+        self._loaded.add((key, stock_code))
+        try:
+            rows, coverage = pd.read_pickle(self._path(key, stock_code))
+        except FileNotFoundError:
+            return
+        self._rows[(key, stock_code)] = rows
+        self._coverage[(key, stock_code)] = coverage
+
+    def _save(self, key: str, stock_code: str) -> None:
+        """Save rows and coverage of stock to directory, under lock."""
+        if self.directory is None:
+            return
+        path = self._path(key, stock_code)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        pd.to_pickle(
+            (self._rows[(key, stock_code)], self._coverage[(key, stock_code)]),
+            tmp_path,
+        )
+        os.replace(tmp_path, path)
+
+    def missing(
+        self,
+        key: str,
+        stock_code: str,
+        metrics: list[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> dict[str, list[Interval]]:
+        """Get date gaps of every metric of stock between start and end."""
+        with self._lock:
+            self._load(key, stock_code)
+            coverage = self._coverage.get((key, stock_code), {})
+            return {
+                metric: gaps
+                for metric in metrics
+                if (gaps := subtract_intervals(coverage.get(metric, []), start, end))
+            }
+
+    def update(
+        self,
+        key: str,
+        stock_code: str,
+        df: pd.DataFrame,
+        metrics: list[str],
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> None:
+        """Store rows of stock, and mark metrics covered from start to end."""
+        df = df.set_index("date")
+        df = df[~df.index.duplicated(keep="last")]
+        with self._lock:
+            self._load(key, stock_code)
+            rows = self._rows.get((key, stock_code))
+            rows = df if rows is None else df.combine_first(rows)
+            self._rows[(key, stock_code)] = rows.sort_index()
+            coverage = self._coverage.setdefault((key, stock_code), {})
+            for metric in metrics:
+                coverage[metric] = merge_intervals(coverage.get(metric, []), start, end)
+            self._save(key, stock_code)
+
+    def get(
+        self,
+        key: str,
+        stock_code: str,
+        columns: list[str] | None,
+        start: pd.Timestamp,
+        end: pd.Timestamp,
+    ) -> pd.DataFrame | None:
+        """Get rows of stock between start and end, all columns if None."""
+        with self._lock:
+            self._load(key, stock_code)
+            rows = self._rows.get((key, stock_code))
+        if rows is None:
+            return None
+        rows = rows.loc[start:end]
+        if columns is not None:
+            rows = rows.reindex(columns=columns)
+        return rows.reset_index()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self._coverage.clear()
+            self._loaded.clear()
+            if self.directory is not None:
+                for path in self.directory.glob("*.pkl"):
+                    path.unlink(missing_ok=True)
+
+
+_cache: BaseCache | None = None
+# `cache_dir` setting the cache was created from, None if it was set.
+_cache_dir: str | None = None
+_subset_cache: SubsetCache | None = None
+# `cache_dir` setting the subset cache was created from, None if it was set.
+_subset_cache_dir: str | None = None
+
+
+def get_cache() -> BaseCache | None:
+    """Get persistent cache, created from `cache_dir` setting.
+
+    The setting is checked on every call, the cache is created again when it
+    changes, and disabled when it's empty. A cache set by `set_cache` is
+    always used.
+    """
+    global _cache, _cache_dir
+    if _cache is not None and _cache_dir is None:
+        return _cache
+    if not settings.cache_dir:
+        return None
+    if _cache is None or _cache_dir != settings.cache_dir:
+        _cache = SQLiteCache(settings.cache_dir)
+        _cache_dir = settings.cache_dir
+    return _cache
+
+
+def set_cache(cache: BaseCache | None) -> None:
+    """Set persistent cache, e.g. a custom `BaseCache` implementation.
+
+    Set None to create it from `cache_dir` setting again.
+    """
+    global _cache, _cache_dir
+    _cache = cache
+    _cache_dir = None
+
+
+def get_subset_cache() -> SubsetCache | None:
+    """Get subset cache if `subset_cache` setting is enabled.
+
+    With `cache_dir` setting, it's persisted to the `subset` subdirectory.
+    Settings are checked on every call, the cache is created again when
+    `cache_dir` changes. A cache set by `set_subset_cache` is used as long
+    as `subset_cache` is enabled.
+    """
+    global _subset_cache, _subset_cache_dir
+    if not settings.subset_cache:
+        return None
+    if _subset_cache is not None and _subset_cache_dir is None:
+        return _subset_cache
+    if _subset_cache is None or _subset_cache_dir != settings.cache_dir:
+        _subset_cache = SubsetCache(
+            pathlib.Path(settings.cache_dir) / "subset" if settings.cache_dir else None
+        )
+        _subset_cache_dir = settings.cache_dir
+    return _subset_cache
+
+
+def set_subset_cache(cache: SubsetCache | None) -> None:
+    """Set subset cache, e.g. a new one to drop cached results.
+
+    Set None to create it from settings again.
+    """
+    global _subset_cache, _subset_cache_dir
+    _subset_cache = cache
+    _subset_cache_dir = None
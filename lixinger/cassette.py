@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import json
+import os
+import pathlib
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Literal
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+from lixinger import client
+from lixinger.cache import make_cache_key
+
+CassetteMode = Literal["record", "replay", "once"]
+
+
+class CassetteError(Exception):
+    """Request is not recorded in the cassette being replayed."""
+
+
+class Cassette:
+    """Recorded requests and raw responses, stored as gzipped JSON.
+
+    Requests are keyed by their url relative to `base_url` and payload
+    without token, so cassettes don't leak the token and are replayed against
+    any server. Response bodies are replayed byte for byte, identical
+    requests recorded several times are replayed in the recorded order.
+    """
+
+    def __init__(self, path: str | os.PathLike, recording: bool = False) -> None:
+        self.path = pathlib.Path(path).expanduser()
+        self.recording = recording
+        self.interactions: list[dict[str, any]] = []
+        self._lock = threading.Lock()
+        self._replayed: dict[str, int] = {}
+        self._index: dict[str, list[dict[str, any]]] = {}
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> Cassette:
+        cassette = cls(path)
+        with gzip.open(cassette.path, "rt", encoding="utf-8") as f:
+            for interaction in json.load(f)["interactions"]:
+                cassette.add(interaction)
+        return cassette
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            json.dump(
+                {"version": 1, "interactions": self.interactions},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+
+    def add(self, interaction: dict[str, any]) -> None:
+        key = make_key(interaction["url"], interaction["data"], interaction["json"])
+        with self._lock:
+            self.interactions.append(interaction)
+            self._index.setdefault(key, []).append(interaction)
+
+    def record(self, url: str, data=None, json=None, **kwargs: any) -> Response:
+        """Transport sending request by session, and recording it."""
+        response = client.request(url, data=data, json=json, **kwargs)
+        interaction = {
+            "url": client.get_relative_url(url),
+            "data": data,
+            "json": strip_token(json),
+            "status_code": response.status_code,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() == "content-type"
+            },
+        }
+        interaction.update(encode_body(response.content))
+        self.add(interaction)
+        return response
+
+    def replay(self, url: str, data=None, json=None, **_: any) -> Response:
+        """Transport responding with recorded response, without network."""
+        key = make_key(client.get_relative_url(url), data, strip_token(json))
+        with self._lock:
+            interactions = self._index.get(key)
+            if not interactions:
+                raise CassetteError(f"{key} is not recorded in {self.path}")
+            i = self._replayed.get(key, 0)
+            self._replayed[key] = i + 1
+        interaction = interactions[min(i, len(interactions) - 1)]
+        response = Response()
+        response.url = url
+        response.status_code = interaction["status_code"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response._content = decode_body(interaction)
+        response.encoding = "utf-8"
+        return response
+
+
+def strip_token(payload: any) -> any:
+    if isinstance(payload, dict) and "token" in payload:
+        return {key: value for key, value in payload.items() if key != "token"}
+    return payload
+
+
+def make_key(url: str, data: any, json: any) -> str:
+    return make_cache_key(url, {"data": data, "json": json})
+
+
+def encode_body(content: bytes) -> dict[str, str]:
+    """Encode body as text if it's utf-8, so cassettes compress well."""
+    try:
+        return {"body": content.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(content).decode("ascii")}
+
+
+def decode_body(interaction: dict[str, any]) -> bytes:
+    if "body" in interaction:
+        return interaction["body"].encode("utf-8")
+    return base64.b64decode(interaction["body_base64"])
+
+
+@contextmanager
+def use_cassette(
+    path: str | os.PathLike, mode: CassetteMode = "once"
+) -> Iterator[Cassette]:
+    """Record requests of current context to cassette, or replay them.
+
+    With `record`, requests are sent and the cassette is overwritten on exit.
+    With `replay`, recorded responses are returned and no request is sent,
+    unrecorded requests raise `CassetteError`. With `once`, the cassette is
+    replayed if it exists, and recorded otherwise.
+
+    Example:
+        >>> with use_cassette("cassettes/candlestick.json.gz"):
+        ...     get_candlestick(
+        ...         type_="ex_rights",
+        ...         start_date="2023-01-01",
+        ...         end_date="2023-03-01",
+        ...         stock_code="600519",
+        ...     )
+    """
+    path = pathlib.Path(path).expanduser()
+    if mode == "once":
+        mode = "replay" if path.exists() else "record"
+    if mode == "replay":
+        cassette = Cassette.load(path)
+        with client.use_transport(cassette.replay):
+            yield cassette
+    elif mode == "record":
+        cassette = Cassette(path, recording=True)
+        with client.use_transport(cassette.record):
+            yield cassette
+        cassette.save()
+    else:
+        raise ValueError(f"unknown cassette mode {mode!r}")
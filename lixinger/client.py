@@ -1,20 +1,278 @@
+from __future__ import annotations
+
+import contextvars
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+import numpy as np
 import requests
-from requests import Response, request
-from tenacity import (
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    stop_after_delay,
-    wait_fixed,
-)
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from tenacity import RetryCallState, retry, retry_if_exception_type
+
+from lixinger import metrics
+from lixinger.cache import make_cache_key
+from lixinger.config import settings
+from lixinger.ratelimit import RateLimitError, get_rate_limiter
+from lixinger.singleflight import SingleFlight
+
+_session: Session | None = None
+_session_lock = threading.Lock()
+_transport: ContextVar[Callable | None] = ContextVar("transport", default=None)
+_single_flight = SingleFlight()
+_hedge_executor: ThreadPoolExecutor | None = None
+_hedge_lock = threading.Lock()
+
+
+class ServerError(Exception):
+    """Request failed with a 5xx status code."""
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful requests of every endpoint."""
+
+    def __init__(self, size: int = 1000) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._latencies: dict[str, deque[float]] = {}
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = deque(maxlen=self.size)
+            self._latencies[endpoint].append(seconds)
+
+    def quantile(self, endpoint: str, q: float, min_samples: int = 1) -> float | None:
+        """Get quantile of latencies, None if there are too few of them."""
+        with self._lock:
+            latencies = list(self._latencies.get(endpoint, ()))
+        if len(latencies) < max(min_samples, 1):
+            return None
+        return float(np.quantile(latencies, q))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._latencies.clear()
+
+
+latencies = LatencyTracker()
+
+
+def get_session() -> Session:
+    """Get shared session, connections are kept alive and reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.pool_size,
+                    pool_maxsize=settings.pool_size,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(
+                    {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"}
+                )
+                _session = session
+    return _session
+
+
+def close_session() -> None:
+    """Close shared session, a new one will be created on next request."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+@contextmanager
+def use_transport(transport: Callable) -> Iterator[None]:
+    """Send requests of current context with `transport` instead of session."""
+    token = _transport.set(transport)
+    try:
+        yield
+    finally:
+        _transport.reset(token)
+
+
+def get_relative_url(url: str) -> str:
+    """Get url relative to `base_url` setting, e.g. `cn/company`."""
+    if url.startswith(settings.base_url):
+        url = url[len(settings.base_url) :]
+    return url.strip("/")
+
+
+def get_endpoint(url: str) -> str:
+    """Get endpoint of current context, or of the url if unknown."""
+    return metrics.get_endpoint() or get_relative_url(url)
+
+
+def get_timeout(url: str) -> tuple[float, float]:
+    """Get connect and read timeouts of url, read timeouts are per endpoint."""
+    read_timeout = settings.timeouts.get(get_endpoint(url), settings.read_timeout)
+    return settings.connect_timeout, read_timeout
+
+
+def get_hedge_delay(url: str) -> float | None:
+    """Get seconds after which a hedged request is sent, None if disabled."""
+    if not settings.hedge:
+        return None
+    return latencies.quantile(
+        get_endpoint(url), settings.hedge_quantile, settings.hedge_min_samples
+    )
+
+
+def stop_retrying(retry_state: RetryCallState) -> bool:
+    return (
+        retry_state.attempt_number >= settings.retry_attempts
+        or retry_state.seconds_since_start >= settings.retry_max_delay
+    )
+
+
+def wait_backoff(retry_state: RetryCallState) -> float:
+    """Exponential backoff with full jitter."""
+    backoff = settings.retry_backoff * 2 ** (retry_state.attempt_number - 1)
+    return random.uniform(0, min(backoff, settings.retry_max_wait))
+
+
+def record_retry(retry_state: RetryCallState) -> None:
+    metrics.emit(
+        "retry",
+        get_endpoint(retry_state.args[0]),
+        exception=type(retry_state.outcome.exception()).__name__,
+    )
+
+
+def record_response(url: str, response: any, seconds: float) -> None:
+    endpoint = get_endpoint(url)
+    metrics.emit(
+        "request",
+        endpoint,
+        status=str(response.status_code),
+        seconds=seconds,
+        bytes=len(response.content),
+    )
+    if response.status_code < 400:
+        latencies.observe(endpoint, seconds)
+
+
+def get_transport() -> Callable | None:
+    """Get transport of current context, None if requests are sent by session."""
+    return _transport.get()
+
+
+def post(url: str, data=None, json=None, **kwargs: any) -> Response:
+    """Post request by transport of current context, or by session."""
+    transport = _transport.get()
+    if transport is not None:
+        return transport(url, data=data, json=json, **kwargs)
+    return request(url, data=data, json=json, **kwargs)
+
+
+def request(url: str, data=None, json=None, **kwargs: any) -> Response:
+    """Post request by session, concurrent identical requests are sent once."""
+    key = make_cache_key(url, {"data": data, "json": json})
+    response, shared = _single_flight.do(
+        key, lambda: send(url, data=data, json=json, **kwargs)
+    )
+    if shared:
+        metrics.emit("coalesced", get_endpoint(url))
+    return response
 
 
 @retry(
-    stop=(stop_after_delay(60) | stop_after_attempt(3)),
-    wait=wait_fixed(3),
+    stop=stop_retrying,
+    wait=wait_backoff,
     retry=retry_if_exception_type(
-        (requests.exceptions.Timeout, requests.exceptions.ProxyError)
+        (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            ServerError,
+            RateLimitError,
+        )
     ),
+    before_sleep=record_retry,
 )
-def post(url: str, data=None, json=None, **kwargs: any) -> Response:
-    return request("post", url, data=data, json=json, **kwargs)
+def send(url: str, data=None, json=None, **kwargs: any) -> Response:
+    """Send request with timeouts, retry on transient errors.
+
+    With `hedge` setting, a duplicate request is sent if no response arrives
+    within the `hedge_quantile` of the endpoint's latencies, and whichever
+    returns first is taken.
+    """
+    kwargs.setdefault("timeout", get_timeout(url))
+    delay = get_hedge_delay(url)
+    if delay is None:
+        return send_once(url, data=data, json=json, **kwargs)
+    return hedge(lambda: send_once(url, data=data, json=json, **kwargs), delay, url)
+
+
+def send_once(url: str, data=None, json=None, **kwargs: any) -> Response:
+    rate_limiter = get_rate_limiter()
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+    start = time.perf_counter()
+    response = get_session().post(url, data=data, json=json, **kwargs)
+    record_response(url, response, time.perf_counter() - start)
+    check_rate_limit(response)
+    check_server_error(response)
+    return response
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=2 * settings.pool_size,
+                    thread_name_prefix="lixinger-hedge",
+                )
+    return _hedge_executor
+
+
+def hedge(func: Callable[[], Response], delay: float, url: str) -> Response:
+    """Call func, call it again if it's not done after delay, take the first.
+
+    The first successful response is returned, or the exception of the first
+    call if both of them failed. The slower call is left to finish in the
+    background, as blocking requests can't be cancelled.
+    """
+    executor = get_hedge_executor()
+    futures = [executor.submit(contextvars.copy_context().run, func)]
+    done, _ = wait(futures, timeout=delay)
+    if not done:
+        metrics.emit("hedge", get_endpoint(url))
+        futures.append(executor.submit(contextvars.copy_context().run, func))
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in futures:
+            if future in done and future.exception() is None:
+                return future.result()
+    return futures[0].result()
+
+
+def check_rate_limit(response: any) -> None:
+    """Adjust rate limiter by response, raise if it exceeded the rate limit."""
+    rate_limiter = get_rate_limiter()
+    if response.status_code == 429:
+        if rate_limiter is not None:
+            rate_limiter.backoff()
+        raise RateLimitError(f"[429]{response.text}")
+    if rate_limiter is not None:
+        rate_limiter.recover()
+
+
+def check_server_error(response: any) -> None:
+    """Raise if the request failed with a 5xx status code."""
+    if response.status_code >= 500:
+        raise ServerError(f"[{response.status_code}]{response.text}")
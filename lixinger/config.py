@@ -2,9 +2,11 @@ from __future__ import annotations
 
 import os
 import pathlib
-from typing import Callable
+import threading
+from typing import TYPE_CHECKING, Callable
 
-from dynaconf import Dynaconf, Validator
+if TYPE_CHECKING:
+    from dynaconf import Validator
 
 DEFAULT_SETTINGS_PATH: pathlib.Path = (
     pathlib.Path(__file__).resolve().parent / "settings.toml"
@@ -31,9 +33,35 @@ def cast(v: str) -> Callable:
     return decorator
 
 
-class TypedDynaconf(Dynaconf):
+class TypedDynaconf:
+    """Types of settings, settings are cast to them when loaded."""
+
     url: str
     token: str
+    cache_dir: str
+    cache_ttl: float
+    pool_size: int
+    max_workers: int
+    rate_limit: float
+    rate_limit_burst: float
+    rate_limit_lock_file: str
+    rate_limit_codes: list
+    sync_dir: str
+    aio_max_concurrency: int
+    compact: bool
+    subset_cache: bool
+    compact_float32: bool
+    compact_arrow: bool
+    connect_timeout: float
+    read_timeout: float
+    timeouts: dict
+    retry_attempts: int
+    retry_backoff: float
+    retry_max_wait: float
+    retry_max_delay: float
+    hedge: bool
+    hedge_quantile: float
+    hedge_min_samples: int
 
 
 def get_validators() -> list[Validator]:
@@ -41,6 +69,8 @@ def get_validators() -> list[Validator]:
 
     Cast settings to their types.
     """
+    from dynaconf import Validator
+
     settings_types = vars(TypedDynaconf)["__annotations__"]
     return [
         Validator(key, cast=cast(settings_cast_map.get(key, type_)))
@@ -53,10 +83,12 @@ def load_settings(
     user_settings_path: pathlib.Path = USER_SETTINGS_PATH,
 ) -> TypedDynaconf:
     """Load settings from default settings and user settings file."""
+    from dynaconf import Dynaconf
+
     settings_files = (
         [path] if not user_settings_path.exists() else [path, user_settings_path]
     )
-    default_settings = TypedDynaconf(
+    default_settings = Dynaconf(
         settings_files=settings_files,
         merge_enabled=True,
         environments=True,
@@ -67,4 +99,26 @@ def load_settings(
     return default_settings
 
 
-settings = load_settings()
+class LazySettings:
+    """Settings loaded on first access, so importing lixinger stays cheap."""
+
+    def __init__(self, loader: Callable[[], TypedDynaconf]) -> None:
+        object.__setattr__(self, "_loader", loader)
+        object.__setattr__(self, "_settings", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self) -> TypedDynaconf:
+        if self._settings is None:
+            with self._lock:
+                if self._settings is None:
+                    object.__setattr__(self, "_settings", self._loader())
+        return self._settings
+
+    def __getattr__(self, name: str) -> any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: any) -> None:
+        setattr(self._load(), name, value)
+
+
+settings: TypedDynaconf = LazySettings(load_settings)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import os
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lixinger.api.cn.index.constituents import get_index_constituents
+from lixinger.config import settings
+from lixinger.endpoint import submit
+
+KEY = ["index_code", "stock_code"]
+
+
+class ConstituentsHistory:
+    """Point-in-time constituents of indices.
+
+    Membership is stored as `add` and `remove` events between sampled dates,
+    plus a full snapshot every `snapshot_every` samples. Queries are answered
+    from an in-memory index of membership intervals, without requests.
+    """
+
+    def __init__(
+        self,
+        events: pd.DataFrame,
+        snapshots: dict[pd.Timestamp, pd.DataFrame],
+        start_date: str | pd.Timestamp,
+        end_date: str | pd.Timestamp,
+    ) -> None:
+        self.events = events
+        self.snapshots = snapshots
+        self.start_date = pd.Timestamp(start_date)
+        self.end_date = pd.Timestamp(end_date)
+        self.intervals = build_intervals(events)
+        self._by_index = group_intervals(self.intervals, "index_code", "stock_code")
+        self._by_stock = group_intervals(self.intervals, "stock_code", "index_code")
+
+    @classmethod
+    def build(
+        cls,
+        index_codes: list[str],
+        start_date: str,
+        end_date: str,
+        freq: str | pd.DateOffset = pd.offsets.BMonthEnd(),
+        snapshot_every: int = 12,
+    ) -> ConstituentsHistory:
+        """Build history by requesting constituents on every sampled date.
+
+        Dates are sampled by `freq` between start and end date, so changes are
+        dated to the first sample after them.
+        """
+        dates = pd.DatetimeIndex(
+            [
+                pd.Timestamp(start_date),
+                *pd.date_range(start_date, end_date, freq=freq),
+                pd.Timestamp(end_date),
+            ]
+        ).unique()
+        with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
+            futures = [
+                submit(
+                    executor,
+                    get_index_constituents,
+                    date=date.strftime("%Y-%m-%d"),
+                    stock_codes=index_codes,
+                )
+                for date in dates
+            ]
+            members = [future.result()[KEY] for future in futures]
+
+        events = []
+        snapshots = {}
+        previous = pd.DataFrame(columns=KEY)
+        for i, (date, current) in enumerate(zip(dates, members)):
+            if i % snapshot_every == 0:
+                snapshots[date] = current.reset_index(drop=True)
+            merged = previous.merge(current, on=KEY, how="outer", indicator=True)
+            changes = merged[merged["_merge"] != "both"]
+            events.append(
+                pd.DataFrame(
+                    {
+                        "date": date,
+                        "index_code": changes["index_code"],
+                        "stock_code": changes["stock_code"],
+                        "event": np.where(
+                            changes["_merge"] == "right_only", "add", "remove"
+                        ),
+                    }
+                )
+            )
+            previous = current
+        events = pd.concat(events, ignore_index=True)
+        return cls(events, snapshots, dates[0], dates[-1])
+
+    def _check_date(self, date: str | pd.Timestamp) -> np.datetime64:
+        date = pd.Timestamp(date)
+        if not self.start_date <= date <= self.end_date:
+            raise ValueError(
+                f"{date:%Y-%m-%d} is out of history range "
+                f"{self.start_date:%Y-%m-%d} to {self.end_date:%Y-%m-%d}"
+            )
+        return date.to_datetime64()
+
+    def members(self, index_code: str, date: str | pd.Timestamp) -> list[str]:
+        """Stock codes of index constituents on date."""
+        return query_intervals(self._by_index, index_code, self._check_date(date))
+
+    def indices(self, stock_code: str, date: str | pd.Timestamp) -> list[str]:
+        """Codes of indices holding stock on date."""
+        return query_intervals(self._by_stock, stock_code, self._check_date(date))
+
+    def save(self, path: str | os.PathLike) -> None:
+        with open(path, "wb") as f:
+            pickle.dump(
+                (self.events, self.snapshots, self.start_date, self.end_date), f
+            )
+
+    @classmethod
+    def load(cls, path: str | os.PathLike) -> ConstituentsHistory:
+        with open(path, "rb") as f:
+            return cls(*pickle.load(f))
+
+
+def build_intervals(events: pd.DataFrame) -> pd.DataFrame:
+    """Pair add and remove events into membership intervals.
+
+    `end` is the date of the remove event, NaT while still a member.
+    """
+    events = events.sort_values(by=[*KEY, "date"], kind="stable")
+    events = events.assign(n=events.groupby([*KEY, "event"]).cumcount())
+    adds = events[events["event"] == "add"]
+    removes = events[events["event"] == "remove"]
+    intervals = adds.merge(
+        removes[[*KEY, "n", "date"]], on=[*KEY, "n"], how="left", suffixes=("", "_end")
+    )
+    return intervals.rename(columns={"date": "start", "date_end": "end"})[
+        [*KEY, "start", "end"]
+    ].reset_index(drop=True)
+
+
+def group_intervals(
+    intervals: pd.DataFrame, by: str, value: str
+) -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Group interval starts, ends and values by key."""
+    return {
+        key: (
+            group["start"].to_numpy(),
+            group["end"].to_numpy(),
+            group[value].to_numpy(),
+        )
+        for key, group in intervals.groupby(by, sort=False)
+    }
+
+
+def query_intervals(
+    groups: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]],
+    key: str,
+    date: np.datetime64,
+) -> list[str]:
+    if key not in groups:
+        return []
+    starts, ends, values = groups[key]
+    held = (starts <= date) & ~(ends <= date)
+    return sorted(values[held])
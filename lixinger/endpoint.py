@@ -0,0 +1,825 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import inspect
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from functools import wraps
+from typing import Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from pydantic import validate_arguments
+from tenacity import RetryCallState, retry, retry_if_exception_type
+
+from lixinger import aio, client, metrics
+from lixinger.cache import (
+    Interval,
+    get_cache,
+    get_subset_cache,
+    is_forward_adjusted,
+    is_immutable,
+    make_cache_key,
+)
+from lixinger.config import settings
+from lixinger.ratelimit import RateLimitError
+from lixinger.utils import (
+    camel_case_to_snake_case,
+    compact_df,
+    hashable_cache,
+)
+
+_request_slots: threading.BoundedSemaphore | None = None
+_request_slots_lock = threading.Lock()
+
+
+def get_request_slots() -> threading.BoundedSemaphore:
+    """Get semaphore bounding concurrent blocking requests by `max_workers`."""
+    global _request_slots
+    if _request_slots is None:
+        with _request_slots_lock:
+            if _request_slots is None:
+                _request_slots = threading.BoundedSemaphore(settings.max_workers)
+    return _request_slots
+
+
+def bounded(func: Callable) -> Callable:
+    """Bound concurrent calls of api function by `max_workers` overall.
+
+    Window, chunk and subset pools are nested, so their requests are bounded
+    here, where they are sent, instead of by every pool.
+    """
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> any:
+        with get_request_slots():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def submit(executor: Executor, func: Callable, *args: any, **kwargs: any) -> Future:
+    """Submit func to executor, run it in a copy of current context."""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+def plan_request_date_range(
+    kwargs: dict[str, any], years: int = 10, newest_first: bool = False
+) -> list[dict[str, any]]:
+    """Plan request params of every date range window, at most `years` long.
+
+    With `newest_first`, windows are planned backwards from `end_date`, so the
+    latest window is a full one, and returned from the latest to the oldest.
+    """
+    start_date_str = kwargs.get("start_date")
+    end_date_str = kwargs.get("end_date")
+
+    if start_date_str is None:
+        if kwargs.get("date") is not None:
+            return [kwargs]
+        raise ValueError("start_date is required")
+    start_date = pd.Timestamp(start_date_str)
+
+    if end_date_str is None:
+        end_date = pd.Timestamp("today").normalize()
+    else:
+        end_date = pd.Timestamp(end_date_str)
+
+    if start_date > end_date:
+        raise ValueError("start_date should be less than end_date")
+
+    ranges = []
+    if newest_first:
+        while start_date <= end_date:
+            new_start_date = max(end_date - pd.DateOffset(years=years), start_date)
+            ranges.append((new_start_date, end_date))
+            end_date = new_start_date - pd.Timedelta(days=1)
+    else:
+        while start_date <= end_date:
+            new_end_date = min(start_date + pd.DateOffset(years=years), end_date)
+            ranges.append((start_date, new_end_date))
+            start_date = new_end_date + pd.Timedelta(days=1)
+    return [
+        {
+            **kwargs,
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": end.strftime("%Y-%m-%d"),
+        }
+        for start, end in ranges
+    ]
+
+
+def take_latest(df: pd.DataFrame, n: int) -> pd.DataFrame:
+    """Take latest `n` rows of dataframe, as the `limit` param of api does."""
+    if len(df) <= n:
+        return df
+    if "date" in df.columns:
+        return df.sort_values(by="date").iloc[len(df) - n :]
+    return df.iloc[:n]
+
+
+def get_natural_key(df: pd.DataFrame) -> list[str]:
+    """Get columns identifying a row of time series, empty if there's no date."""
+    if "date" not in df.columns:
+        return []
+    return [column for column in ("stock_code", "date") if column in df.columns]
+
+
+def drop_overlaps(dfs: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    """Drop rows of windows already returned by a later window, by natural key.
+
+    Windows are ordered from the oldest to the latest. Only rows from the
+    first date of the later windows on are compared, and rows of the same
+    window are kept, e.g. several events on one date.
+    """
+    result = []
+    boundary = None
+    later = []
+    for df in reversed(dfs):
+        key = get_natural_key(df)
+        if key and boundary is not None and len(df):
+            overlap = df["date"] >= boundary
+            if overlap.any():
+                seen = pd.concat([later_df[key] for later_df in later])
+                seen = pd.MultiIndex.from_frame(seen[seen["date"] <= df["date"].max()])
+                duplicated = pd.MultiIndex.from_frame(df[key]).isin(seen)
+                df = df[~duplicated]
+        if key and len(df):
+            first_date = df["date"].min()
+            boundary = first_date if boundary is None else min(boundary, first_date)
+        later.append(df)
+        result.append(df)
+    return result[::-1]
+
+
+def concat_windows(dfs: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concat dataframes of date range windows at once, without overlaps."""
+    if not dfs:
+        return pd.DataFrame()
+    df = dfs[0] if len(dfs) == 1 else pd.concat(drop_overlaps(dfs))
+    if "date" in df.columns and not df["date"].is_monotonic_increasing:
+        df = df.sort_values(by="date", kind="stable")
+    return df
+
+
+def adjust_request_date_range(func: Callable) -> Callable:
+    """Adjust request date range.
+
+    Windows are requested concurrently, at most `max_workers` requests are
+    in flight overall, see `bounded`. With
+    `limit`, windows are requested from the latest one backwards, and the
+    older ones only if the latest doesn't have `limit` rows yet, windows no
+    longer needed are cancelled.
+    """
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        limit = kwargs.get("limit")
+        if limit is None:
+            windows = plan_request_date_range(kwargs)
+        else:
+            windows = plan_request_date_range(kwargs, newest_first=True)
+        if len(windows) == 1:
+            return concat_windows([func(*args, **windows[0])])
+        if limit is not None:
+            return request_latest(func, args, windows, limit)
+
+        with ThreadPoolExecutor(
+            max_workers=min(settings.max_workers, len(windows))
+        ) as executor:
+            futures = [submit(executor, func, *args, **window) for window in windows]
+            try:
+                dfs = [future.result() for future in futures]
+            finally:
+                for future in futures:
+                    future.cancel()
+        return concat_windows(dfs)
+
+    return wrapper
+
+
+def collect_latest(dfs: list[pd.DataFrame], df: pd.DataFrame, limit: int) -> int:
+    """Collect rows of window older than `dfs`, return rows still missing.
+
+    `dfs` are ordered from the latest window to the oldest.
+    """
+    df = drop_overlaps([df, *dfs[::-1]])[0]
+    rows = sum(len(collected) for collected in dfs)
+    df = take_latest(df, limit - rows)
+    dfs.append(df)
+    return limit - rows - len(df)
+
+
+def count_windows(dfs: list[pd.DataFrame], missing: int, windows: int) -> int:
+    """Estimate count of older windows having the missing rows.
+
+    Older windows are assumed to be as dense as the latest one.
+    """
+    rows = len(dfs[0])
+    return windows if rows == 0 else min(-(-missing // rows), windows)
+
+
+def request_latest(
+    func: Callable, args: tuple, windows: list[dict[str, any]], limit: int
+) -> pd.DataFrame:
+    """Request latest `limit` rows of windows, ordered from the latest.
+
+    The latest window is requested first, then just enough older windows
+    concurrently, by the estimate of `count_windows`, until rows are enough.
+    """
+    dfs = []
+    missing = collect_latest(dfs, func(*args, **windows[0]), limit)
+    pending = windows[1:]
+    with ThreadPoolExecutor(
+        max_workers=min(settings.max_workers, max(len(pending), 1))
+    ) as executor:
+        while missing > 0 and pending:
+            count = count_windows(dfs, missing, len(pending))
+            batch, pending = pending[:count], pending[count:]
+            futures = [submit(executor, func, *args, **window) for window in batch]
+            try:
+                for future in futures:
+                    missing = collect_latest(dfs, future.result(), limit)
+                    if missing <= 0:
+                        break
+            finally:
+                for future in futures:
+                    future.cancel()
+    return concat_windows(dfs[::-1])
+
+
+def adjust_request_date_range_async(func: Callable) -> Callable:
+    """Adjust request date range of async api function."""
+
+    @wraps(func)
+    async def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        limit = kwargs.get("limit")
+        if limit is None:
+            windows = plan_request_date_range(kwargs)
+            tasks = [asyncio.ensure_future(func(*args, **window)) for window in windows]
+            try:
+                return concat_windows([await task for task in tasks])
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        windows = plan_request_date_range(kwargs, newest_first=True)
+        dfs = []
+        missing = collect_latest(dfs, await func(*args, **windows[0]), limit)
+        pending = windows[1:]
+        while missing > 0 and pending:
+            count = count_windows(dfs, missing, len(pending))
+            batch, pending = pending[:count], pending[count:]
+            tasks = [asyncio.ensure_future(func(*args, **window)) for window in batch]
+            try:
+                for task in tasks:
+                    missing = collect_latest(dfs, await task, limit)
+                    if missing <= 0:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+        return concat_windows(dfs[::-1])
+
+    return wrapper
+
+
+class ChunkedRequestError(ValueError):
+    """Some chunks of a chunked request failed.
+
+    `errors` holds request params and exception of every failed chunk, `df`
+    holds merged result of succeeded chunks.
+    """
+
+    def __init__(
+        self, errors: list[tuple[dict[str, any], BaseException]], df: pd.DataFrame
+    ) -> None:
+        self.errors = errors
+        self.df = df
+        super().__init__(f"{len(errors)} chunks failed, first error: {errors[0][1]!r}")
+
+
+def plan_request_chunks(
+    kwargs: dict[str, any], chunks: dict[str, int]
+) -> list[list[dict[str, any]]]:
+    """Plan request params of every chunk.
+
+    List params in `chunks` are split into chunks of given size, `stock_codes`
+    is split one by one for date range requests as the server requires.
+    Chunks are grouped by `stock_codes` chunk.
+    """
+    sizes = dict(chunks)
+    if "stock_codes" in sizes and kwargs.get("start_date") is not None:
+        sizes["stock_codes"] = 1
+
+    groups = [[kwargs]]
+    for key, size in sizes.items():
+        values = kwargs.get(key)
+        if values is None or len(values) <= size:
+            continue
+        values_chunks = [values[i : i + size] for i in range(0, len(values), size)]
+        if key == "stock_codes":
+            groups = [
+                [{**params, key: chunk} for params in group]
+                for group in groups
+                for chunk in values_chunks
+            ]
+        else:
+            groups = [
+                [{**params, key: chunk} for params in group for chunk in values_chunks]
+                for group in groups
+            ]
+    return groups
+
+
+def merge_chunks(
+    groups: list[list[dict[str, any]]],
+    results: list[list[pd.DataFrame | BaseException]],
+) -> pd.DataFrame:
+    """Merge dataframes of chunks.
+
+    Dataframes of the same `stock_codes` chunk are merged column-wise, then
+    concatenated in order of `stock_codes`. Raise `ChunkedRequestError` if any
+    chunk failed.
+    """
+    errors = []
+    dfs = []
+    for group, group_results in zip(groups, results):
+        df = None
+        for params, result in zip(group, group_results):
+            if isinstance(result, BaseException):
+                errors.append((params, result))
+            elif df is None:
+                df = result
+            else:
+                keys = [key for key in ("stock_code", "date") if key in df.columns]
+                df = df.merge(result, on=keys, how="outer", suffixes=("", "_y"))
+        if df is not None:
+            dfs.append(df)
+
+    if not dfs:
+        df = pd.DataFrame()
+    elif len(dfs) == 1:
+        df = dfs[0]
+    else:
+        df = pd.concat(dfs, ignore_index=True)
+    if errors:
+        raise ChunkedRequestError(errors, df)
+    return df
+
+
+def split_request(func: Callable, chunks: dict[str, int]) -> Callable:
+    """Split list params into chunks, and request them concurrently."""
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        groups = plan_request_chunks(kwargs, chunks)
+        if len(groups) == 1 and len(groups[0]) == 1:
+            return func(*args, **kwargs)
+
+        with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
+            futures = [
+                [submit(executor, func, *args, **params) for params in group]
+                for group in groups
+            ]
+            results = [
+                [future.exception() or future.result() for future in group]
+                for group in futures
+            ]
+        return merge_chunks(groups, results)
+
+    return wrapper
+
+
+def split_request_async(func: Callable, chunks: dict[str, int]) -> Callable:
+    """Split list params of async api function into chunks."""
+
+    @wraps(func)
+    async def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        groups = plan_request_chunks(kwargs, chunks)
+        if len(groups) == 1 and len(groups[0]) == 1:
+            return await func(*args, **kwargs)
+
+        results = await asyncio.gather(
+            *[
+                asyncio.gather(
+                    *[func(*args, **params) for params in group],
+                    return_exceptions=True,
+                )
+                for group in groups
+            ]
+        )
+        return merge_chunks(groups, results)
+
+    return wrapper
+
+
+def iter_request(
+    func: Callable, *, windowed: bool, chunks: dict[str, int] | None = None
+) -> Callable:
+    """Iterate request results, one dataframe per date range window and chunk.
+
+    At most `max_workers` results are requested ahead, so memory is bounded.
+    With `limit`, only the latest `limit` rows are requested, as by
+    `request_latest`, and one dataframe is yielded per chunk.
+    """
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> Iterator[pd.DataFrame]:
+        latest = windowed and kwargs.get("limit") is not None
+        units = []
+        for group in plan_request_chunks(kwargs, chunks or {}):
+            if windowed and not latest:
+                units.extend(
+                    list(windows)
+                    for windows in zip(
+                        *[plan_request_date_range(params) for params in group]
+                    )
+                )
+            else:
+                units.append(group)
+
+        def request_unit(unit: list[dict[str, any]]) -> pd.DataFrame:
+            results = []
+            for params in unit:
+                try:
+                    if latest:
+                        windows = plan_request_date_range(params, newest_first=True)
+                        results.append(
+                            request_latest(func, args, windows, params["limit"])
+                        )
+                    else:
+                        results.append(func(*args, **params))
+                except Exception as e:
+                    results.append(e)
+            return merge_chunks([unit], [results])
+
+        with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
+            futures = deque()
+            try:
+                for unit in units:
+                    futures.append(submit(executor, request_unit, unit))
+                    if len(futures) >= settings.max_workers:
+                        yield futures.popleft().result()
+                while futures:
+                    yield futures.popleft().result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    return wrapper
+
+
+def get_endpoint_name(func: Callable) -> str:
+    """Get endpoint name from api function module, e.g. `cn/company/base`."""
+    return func.__module__.split("lixinger.api.", 1)[-1].replace(".", "/")
+
+
+def retry_rate_limited(func: Callable, *, endpoint: str) -> Callable:
+    """Retry api function rejected by a rate limit error code of the server.
+
+    Retries are emitted as `retry` events of `endpoint`, the last error is
+    raised when the `retry_*` settings are exhausted.
+    """
+
+    def record_retry(retry_state: RetryCallState) -> None:
+        metrics.emit(
+            "retry",
+            endpoint,
+            exception=type(retry_state.outcome.exception()).__name__,
+        )
+
+    return retry(
+        stop=client.stop_retrying,
+        wait=client.wait_backoff,
+        retry=retry_if_exception_type(RateLimitError),
+        before_sleep=record_retry,
+        reraise=True,
+    )(func)
+
+
+def persistent_cache(
+    func: Callable, *, endpoint: str, ttl: float | None = None
+) -> Callable:
+    """Persistent cache.
+
+    Immutable history is kept forever, other requests expire after `ttl`
+    seconds, defaults to `cache_ttl` setting.
+    """
+    signature = inspect.signature(func)
+
+    def get_params(args: tuple, kwargs: dict) -> dict[str, any]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return dict(bound.arguments)
+
+    def get_ttl(params: dict[str, any]) -> float | None:
+        if is_immutable(params):
+            return None
+        return settings.cache_ttl if ttl is None else ttl
+
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+            cache = get_cache()
+            if cache is None:
+                return await func(*args, **kwargs)
+            params = get_params(args, kwargs)
+            key = make_cache_key(endpoint, params)
+            df = cache.get(key)
+            metrics.emit("cache", endpoint, layer="persistent", hit=df is not None)
+            if df is None:
+                df = await func(*args, **kwargs)
+                cache.set(key, df, ttl=get_ttl(params))
+            return df
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        cache = get_cache()
+        if cache is None:
+            return func(*args, **kwargs)
+        params = get_params(args, kwargs)
+        key = make_cache_key(endpoint, params)
+        df = cache.get(key)
+        metrics.emit("cache", endpoint, layer="persistent", hit=df is not None)
+        if df is None:
+            df = func(*args, **kwargs)
+            cache.set(key, df, ttl=get_ttl(params))
+        return df
+
+    return wrapper
+
+
+SUBSET_PARAMS = (
+    "stock_codes",
+    "stock_code",
+    "metrics_list",
+    "date",
+    "start_date",
+    "end_date",
+    "limit",
+)
+
+
+def subset_cache(func: Callable, *, endpoint: str) -> Callable:
+    """Subset-aware cache, see `SubsetCache`.
+
+    Dates from today on may still change, so they are always requested and
+    never cached. Queries with `limit`, of the latest date, or of forward
+    adjusted prices bypass the cache.
+    """
+    signature = inspect.signature(func)
+    stock_key = "stock_codes" if "stock_codes" in signature.parameters else "stock_code"
+    multi = stock_key == "stock_codes"
+    has_metrics = "metrics_list" in signature.parameters
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> pd.DataFrame:
+        cache = get_subset_cache()
+        if cache is None:
+            return func(*args, **kwargs)
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        if (
+            params.get("limit") is not None
+            or params.get("date") == "latest"
+            or (params.get("date") is None and params.get("start_date") is None)
+            or is_forward_adjusted(params)
+        ):
+            return func(*args, **kwargs)
+
+        by_date = params.get("start_date") is None
+        if by_date:
+            start = end = pd.Timestamp(params["date"])
+        else:
+            start = pd.Timestamp(params["start_date"])
+            end = pd.Timestamp(params.get("end_date") or "today").normalize()
+        cached_end = min(end, pd.Timestamp("today").normalize() - pd.Timedelta(days=1))
+        fixed = {k: v for k, v in params.items() if k not in SUBSET_PARAMS}
+        key = make_cache_key(endpoint, fixed)
+        stock_codes = params[stock_key] if multi else [params[stock_key]]
+        metrics_list = params["metrics_list"] if has_metrics else ["*"]
+
+        def request(
+            stock_codes: list[str], metrics_list: list[str], start: any, end: any
+        ) -> pd.DataFrame:
+            request_params = {
+                **fixed,
+                stock_key: stock_codes if multi else stock_codes[0],
+            }
+            if has_metrics:
+                request_params["metrics_list"] = metrics_list
+            if by_date:
+                request_params["date"] = start.strftime("%Y-%m-%d")
+            else:
+                request_params["start_date"] = start.strftime("%Y-%m-%d")
+                request_params["end_date"] = end.strftime("%Y-%m-%d")
+            return func(**request_params)
+
+        plan: dict[tuple, list[str]] = {}
+        if start <= cached_end:
+            for stock_code in stock_codes:
+                gaps: dict[Interval, list[str]] = {}
+                missing = cache.missing(
+                    key, stock_code, metrics_list, start, cached_end
+                )
+                for metric in metrics_list:
+                    for gap in missing.get(metric, []):
+                        gaps.setdefault(gap, []).append(metric)
+                for gap, metrics in gaps.items():
+                    plan.setdefault((gap, tuple(metrics)), []).append(stock_code)
+
+        dfs = []
+        with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
+            futures = {
+                (gap, metrics, tuple(codes)): submit(
+                    executor, request, codes, list(metrics), *gap
+                )
+                for (gap, metrics), codes in plan.items()
+            }
+            if end > cached_end:
+                fresh = submit(
+                    executor,
+                    request,
+                    stock_codes,
+                    metrics_list,
+                    max(start, cached_end + pd.Timedelta(days=1)),
+                    end,
+                )
+            for (gap, metrics, codes), future in futures.items():
+                df = future.result()
+                if multi:
+                    rows = dict(tuple(df.groupby("stock_code", sort=False)))
+                else:
+                    rows = {codes[0]: df}
+                for stock_code in codes:
+                    stock_rows = rows.get(stock_code, df.iloc[:0])
+                    if multi:
+                        stock_rows = stock_rows.drop(columns="stock_code")
+                    cache.update(key, stock_code, stock_rows, list(metrics), *gap)
+            if end > cached_end:
+                dfs.append(fresh.result())
+
+        columns = None
+        if has_metrics:
+            columns = [camel_case_to_snake_case(metric) for metric in metrics_list]
+        if start <= cached_end:
+            for stock_code in stock_codes:
+                df = cache.get(key, stock_code, columns, start, cached_end)
+                if df is None:
+                    continue
+                if multi:
+                    df.insert(1, "stock_code", stock_code)
+                dfs.append(df)
+        dfs = [df for df in dfs if not df.empty]
+        if not dfs:
+            return pd.DataFrame(
+                columns=["date", *(["stock_code"] if multi else []), *(columns or [])]
+            )
+        df = pd.concat(dfs, ignore_index=True)
+        if multi:
+            ranks = {stock_code: i for i, stock_code in enumerate(stock_codes)}
+            order = np.lexsort(
+                (df["date"].to_numpy(), df["stock_code"].map(ranks).to_numpy())
+            )
+            return df.take(order).reset_index(drop=True)
+        return df.sort_values(by="date", kind="stable", ignore_index=True)
+
+    return wrapper
+
+
+class Endpoint:
+    """Call plan of api function, compiled once when it's decorated."""
+
+    def __init__(
+        self,
+        func: Callable,
+        *,
+        ttl: float | None = None,
+        chunks: dict[str, int] | None = None,
+        subset: bool = False,
+    ) -> None:
+        self.name = get_endpoint_name(func)
+        self.func = func
+        self.output = func.__globals__.get("Output")
+        self.parameters = inspect.signature(func).parameters
+        self.windowed = (
+            "start_date" in self.parameters and "end_date" in self.parameters
+        )
+        self.chunks = chunks or {}
+        self.subset = subset
+
+        self.request = persistent_cache(
+            metrics.labelled(
+                retry_rate_limited(bounded(func), endpoint=self.name), self.name
+            ),
+            endpoint=self.name,
+            ttl=ttl,
+        )
+        self.call = self.request
+        if self.windowed:
+            self.call = adjust_request_date_range(self.call)
+        if self.chunks:
+            self.call = split_request(self.call, self.chunks)
+        if self.subset:
+            self.call = subset_cache(self.call, endpoint=self.name)
+
+        @wraps(func)
+        async def async_request(*args: any, **kwargs: any) -> pd.DataFrame:
+            return await aio.request(func, *args, **kwargs)
+
+        self.async_request = persistent_cache(
+            metrics.labelled(
+                retry_rate_limited(async_request, endpoint=self.name), self.name
+            ),
+            endpoint=self.name,
+            ttl=ttl,
+        )
+        self.async_call = self.async_request
+        if self.windowed:
+            self.async_call = adjust_request_date_range_async(self.async_call)
+        if self.chunks:
+            self.async_call = split_request_async(self.async_call, self.chunks)
+
+        self.iter = iter_request(
+            self.request, windowed=self.windowed, chunks=self.chunks
+        )
+
+    def finalize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Compact result if `compact` setting is enabled."""
+        if not settings.compact:
+            return df
+        return compact_df(
+            df,
+            self.output,
+            float32=settings.compact_float32,
+            arrow=settings.compact_arrow,
+        )
+
+    def __repr__(self) -> str:
+        return f"Endpoint({self.name!r})"
+
+
+endpoints: dict[str, Endpoint] = {}
+
+
+def cache_clear() -> None:
+    """Clear memory cache of every registered api function."""
+    for endpoint in endpoints.values():
+        endpoint.cache_clear()
+
+
+def api(
+    func: Callable | None = None,
+    *,
+    maxsize=16,
+    ttl: float | None = None,
+    chunks: dict[str, int] | None = None,
+    subset: bool = False,
+) -> Callable:
+    """API decorator.
+
+    List params in `chunks` are split into requests of at most given size.
+    With `subset`, results are also cached by stock, metric and date range,
+    which requires at most one row per stock and date.
+    The async variant of the api function is available as its `aio` attribute,
+    the iterator variant yielding results of every request as they arrive is
+    available as its `iter` attribute, and its call plan is registered in
+    `endpoints` and available as its `endpoint` attribute.
+    """
+
+    def wrapper(_func: Callable) -> Callable:
+        endpoint = Endpoint(_func, ttl=ttl, chunks=chunks, subset=subset)
+        endpoints[endpoint.name] = endpoint
+
+        @hashable_cache(maxsize=maxsize, endpoint=endpoint.name)
+        @validate_arguments
+        @wraps(_func)
+        def _api(*args: any, **kwargs: any) -> Callable:
+            return endpoint.finalize(endpoint.call(*args, **kwargs))
+
+        @validate_arguments
+        @wraps(_func)
+        async def _async_api(*args: any, **kwargs: any) -> pd.DataFrame:
+            return endpoint.finalize(await endpoint.async_call(*args, **kwargs))
+
+        @validate_arguments
+        @wraps(_func)
+        def _iter_api(*args: any, **kwargs: any) -> Iterator[pd.DataFrame]:
+            return map(endpoint.finalize, endpoint.iter(*args, **kwargs))
+
+        _api.aio = _async_api
+        _api.iter = _iter_api
+        _api.endpoint = endpoint
+        endpoint.cache_clear = _api.cache_clear
+        return _api
+
+    if func is not None:
+        return wrapper(func)
+    return wrapper
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import importlib
+from typing import Callable
+
+
+def lazy_getattr(package: str, attributes: dict[str, str]) -> Callable:
+    """Get module `__getattr__` importing attributes from submodules on access.
+
+    `attributes` maps attribute names to submodule names relative to `package`.
+    """
+
+    def __getattr__(name: str) -> any:
+        if name not in attributes:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        module = importlib.import_module(f"{package}.{attributes[name]}")
+        return module if name == attributes[name] else getattr(module, name)
+
+    return __getattr__
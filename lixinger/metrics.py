@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import bisect
+import inspect
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_endpoint: ContextVar[str | None] = ContextVar("endpoint", default=None)
+
+
+@contextmanager
+def use_endpoint(endpoint: str) -> Iterator[None]:
+    """Label events emitted in current context with `endpoint`."""
+    token = _endpoint.set(endpoint)
+    try:
+        yield
+    finally:
+        _endpoint.reset(token)
+
+
+def labelled(func: Callable, endpoint: str) -> Callable:
+    """Label events emitted by calls of func with `endpoint`."""
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args: any, **kwargs: any) -> any:
+            with use_endpoint(endpoint):
+                return await func(*args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args: any, **kwargs: any) -> any:
+        with use_endpoint(endpoint):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def get_endpoint() -> str | None:
+    """Get endpoint of current context."""
+    return _endpoint.get()
+
+
+class Histogram:
+    """Cumulative histogram with fixed buckets."""
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-memory registry of counters and histograms.
+
+    Metrics are keyed by name and sorted label pairs, and exported in
+    Prometheus text format by `to_prometheus`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: dict[tuple, float] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+
+    def inc(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(value)
+
+    def get(self, name: str, **labels: str) -> float:
+        """Get counter value, or observation count of histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        if key in self.histograms:
+            return self.histograms[key].count
+        return self.counters.get(key, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def record(self, event: str, endpoint: str, **data: any) -> None:
+        """Hook recording events emitted by the client."""
+        if event == "request":
+            self.inc(
+                "lixinger_requests_total", endpoint=endpoint, status=data["status"]
+            )
+            self.observe(
+                "lixinger_request_duration_seconds", data["seconds"], endpoint=endpoint
+            )
+            self.inc("lixinger_response_bytes_total", data["bytes"], endpoint=endpoint)
+        elif event == "parse":
+            self.observe(
+                "lixinger_parse_duration_seconds", data["seconds"], endpoint=endpoint
+            )
+            self.inc("lixinger_rows_total", data["rows"], endpoint=endpoint)
+        elif event == "retry":
+            self.inc(
+                "lixinger_retries_total", endpoint=endpoint, exception=data["exception"]
+            )
+        elif event == "error":
+            self.inc("lixinger_errors_total", endpoint=endpoint, code=data["code"])
+        elif event == "coalesced":
+            self.inc("lixinger_coalesced_requests_total", endpoint=endpoint)
+        elif event == "hedge":
+            self.inc("lixinger_hedged_requests_total", endpoint=endpoint)
+        elif event == "cache":
+            self.inc(
+                "lixinger_cache_requests_total",
+                endpoint=endpoint,
+                layer=data["layer"],
+                result="hit" if data["hit"] else "miss",
+            )
+
+    def to_prometheus(self) -> str:
+        """Export metrics in Prometheus text format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            for name in sorted({name for (name, _), _ in counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (_name, labels), value in counters:
+                    if _name == name:
+                        lines.append(f"{name}{format_labels(labels)} {value:g}")
+            for name in sorted({name for (name, _), _ in histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (_name, labels), histogram in histograms:
+                    if _name != name:
+                        continue
+                    count = 0
+                    bounds = [*histogram.buckets, float("inf")]
+                    for bound, bucket_count in zip(bounds, histogram.counts):
+                        count += bucket_count
+                        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                        bucket_labels = format_labels((*labels, ("le", le)))
+                        lines.append(f"{name}_bucket{bucket_labels} {count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum:g}")
+                    lines.append(
+                        f"{name}_count{format_labels(labels)} {histogram.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return f"{{{pairs}}}"
+
+
+registry = MetricsRegistry()
+_hooks: list[Callable] = [registry.record]
+
+
+def add_hook(hook: Callable) -> None:
+    """Add hook called as `hook(event, endpoint, **data)` on every event.
+
+    Events are `request` (status, seconds, bytes), `parse` (seconds, rows),
+    `retry` (exception), `error` (code), `coalesced` for requests sharing
+    the response of an identical request in flight, and `cache` (layer, hit).
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Callable) -> None:
+    """Remove hook, e.g. `registry.record` to disable the built-in registry."""
+    _hooks.remove(hook)
+
+
+def emit(event: str, endpoint: str | None = None, **data: any) -> None:
+    """Emit event to all hooks, labelled with endpoint of current context."""
+    endpoint = endpoint or _endpoint.get() or "unknown"
+    for hook in _hooks:
+        hook(event, endpoint, **data)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from lixinger.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+class RateLimitError(Exception):
+    """Request is rejected by the server for exceeding the rate limit."""
+
+
+class RateLimiter:
+    """Token bucket rate limiter with adaptive backoff.
+
+    The rate is halved every time the server rejects a request for exceeding
+    the rate limit, and recovers additively on every successful request. With
+    `lock_file`, the bucket is shared by all processes using the same file.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float | None = None,
+        lock_file: str | os.PathLike | None = None,
+        min_rate: float = 0.1,
+    ) -> None:
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst or max(rate, 1)
+        self.lock_file = pathlib.Path(lock_file).expanduser() if lock_file else None
+        if self.lock_file is not None and fcntl is None:
+            raise RuntimeError("lock_file is not supported on this platform")
+        self._lock = threading.Lock()
+        self._state = {"rate": rate, "tokens": self.burst, "updated": time.time()}
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[dict[str, float]]:
+        with self._lock:
+            if self.lock_file is None:
+                yield self._state
+                return
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_file, "a+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0)
+                    content = f.read()
+                    state = json.loads(content) if content else dict(self._state)
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def reserve(self) -> float:
+        """Take a token, return seconds to wait before sending the request."""
+        with self._locked_state() as state:
+            now = time.time()
+            tokens = min(
+                self.burst,
+                state["tokens"] + (now - state["updated"]) * state["rate"],
+            )
+            state["tokens"] = tokens - 1
+            state["updated"] = now
+            return max(0.0, -state["tokens"] / state["rate"])
+
+    def acquire(self) -> None:
+        """Block until a request is allowed."""
+        time.sleep(self.reserve())
+
+    def backoff(self) -> None:
+        """Halve the rate after the server rejected a request."""
+        with self._locked_state() as state:
+            state["rate"] = max(state["rate"] / 2, self.min_rate)
+            state["tokens"] = min(state["tokens"], 0)
+
+    def recover(self) -> None:
+        """Increase the rate after a successful request."""
+        with self._locked_state() as state:
+            state["rate"] = min(state["rate"] + self.max_rate / 100, self.max_rate)
+
+
+_rate_limiter: RateLimiter | None = None
+
+
+def get_rate_limiter() -> RateLimiter | None:
+    """Get rate limiter, create it from `rate_limit` settings if needed."""
+    global _rate_limiter
+    if _rate_limiter is None and settings.rate_limit:
+        _rate_limiter = RateLimiter(
+            settings.rate_limit,
+            burst=settings.rate_limit_burst,
+            lock_file=settings.rate_limit_lock_file,
+        )
+    return _rate_limiter
+
+
+def set_rate_limiter(rate_limiter: RateLimiter | None) -> None:
+    """Set rate limiter, e.g. to share one between clients."""
+    global _rate_limiter
+    _rate_limiter = rate_limiter
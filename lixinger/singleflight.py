@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Awaitable, Callable
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: any = None
+        self.exception: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one call.
+
+    Callers arriving while a call with their key is in flight wait for it and
+    share its result, or its exception.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def do(self, key: str, func: Callable[[], any]) -> tuple[any, bool]:
+        """Call func once for concurrent callers, return result and if shared."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except BaseException as e:  # noqa: BLE001
+                call.exception = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        if call.exception is not None:
+            raise call.exception
+        return call.result, not leader
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class AsyncSingleFlight:
+    """Coalesce concurrent coroutine calls with the same key into one call.
+
+    The call runs as its own task, awaited by every caller through a shield,
+    so a cancelled caller, the first one included, doesn't cancel the others.
+    The task is cancelled only when its last caller is cancelled.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _AsyncCall] = {}
+
+    def _forget(self, key: str, call: _AsyncCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(
+        self, key: str, func: Callable[[], Awaitable[any]]
+    ) -> tuple[any, bool]:
+        """Await func once for concurrent callers, return result and if shared."""
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = self._calls[key] = _AsyncCall(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
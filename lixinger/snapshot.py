@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lixinger.api.cn.company.base import get_company
+from lixinger.api.cn.company.fundamental_non_financial import (
+    get_fundamental_non_financial,
+)
+from lixinger.api.cn.company.industries import get_industries
+from lixinger.config import settings
+from lixinger.endpoint import submit
+from lixinger.utils import camel_case_to_snake_case
+
+CATEGORY_COLUMNS = ["area_code", "market", "fs_type", "mutual_markets"]
+
+
+class SnapshotPlan:
+    """Plan of whole market snapshots, reusable for every date of a backfill.
+
+    The company universe and industries are requested once per plan, including
+    delisted companies, and every snapshot only requests fundamentals of the
+    companies listed on its date, in chunks of at most 100 stocks and 48
+    metrics.
+    """
+
+    def __init__(
+        self,
+        metrics: list[str],
+        industries: bool = True,
+        industry_date: str | None = None,
+    ) -> None:
+        self.metrics = metrics
+        self.with_industries = industries
+        self.industry_date = industry_date
+        self._universe: pd.DataFrame | None = None
+        self._industries: pd.DataFrame | None = None
+
+    @property
+    def universe(self) -> pd.DataFrame:
+        """Non-financial companies, including delisted ones."""
+        if self._universe is None:
+            df = get_company(fs_type="non_financial", include_delisted=True)
+            if "delisted_date" not in df.columns:
+                df["delisted_date"] = pd.NaT
+            self._universe = df.set_index("stock_code")
+        return self._universe
+
+    def stock_codes(self, date: str) -> list[str]:
+        """Stock codes of companies listed on date."""
+        universe = self.universe
+        date = pd.Timestamp(date)
+        listed = (universe["ipo_date"].isna() | (universe["ipo_date"] <= date)) & (
+            universe["delisted_date"].isna() | (universe["delisted_date"] > date)
+        )
+        return universe.index[listed].tolist()
+
+    def industries(self, stock_codes: list[str]) -> pd.DataFrame:
+        """Industries of stocks by source, requested once per stock."""
+        known = [] if self._industries is None else self._industries.index
+        missing = [stock_code for stock_code in stock_codes if stock_code not in known]
+        if missing:
+            with ThreadPoolExecutor(max_workers=settings.max_workers) as executor:
+                futures = [
+                    submit(
+                        executor,
+                        get_industries,
+                        stock_code=stock_code,
+                        date=self.industry_date,
+                    )
+                    for stock_code in missing
+                ]
+                dfs = [
+                    future.result().assign(company_code=stock_code)
+                    for stock_code, future in zip(missing, futures)
+                ]
+            self._industries = pd.concat(
+                [self._industries, pivot_industries(pd.concat(dfs), missing)]
+            )
+        return self._industries.reindex(stock_codes).astype("category")
+
+    def __call__(self, date: str) -> pd.DataFrame:
+        """Build snapshot of date, one row per listed company."""
+        stock_codes = self.stock_codes(date)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fundamental = submit(
+                executor,
+                get_fundamental_non_financial,
+                stock_codes=stock_codes,
+                metrics_list=self.metrics,
+                date=date,
+            )
+            industries = (
+                submit(executor, self.industries, stock_codes)
+                if self.with_industries
+                else None
+            )
+            fundamental_df = fundamental.result()
+            industries_df = None if industries is None else industries.result()
+
+        df = self.universe.loc[stock_codes].drop(columns=["delisted_date"])
+        fundamental_df = fundamental_df.drop(columns=["date"]).set_index("stock_code")
+        for metric in self.metrics:
+            column = camel_case_to_snake_case(metric)
+            if column not in fundamental_df.columns:
+                fundamental_df[column] = np.nan
+        df = df.join(fundamental_df)
+        if industries_df is not None:
+            df = df.join(industries_df)
+        df.attrs["date"] = date
+        for column in df.columns.intersection(CATEGORY_COLUMNS):
+            df[column] = df[column].astype("category")
+        return df
+
+
+def pivot_industries(df: pd.DataFrame, stock_codes: list[str]) -> pd.DataFrame:
+    """Pivot industries to one `industry_<source>` column per source."""
+    if df.empty:
+        return pd.DataFrame(index=pd.Index(stock_codes, name="stock_code"))
+    values = ["stock_code", "name"] if "name" in df.columns else ["stock_code"]
+    df = df.drop_duplicates(subset=["company_code", "source"], keep="last")
+    wide = df.pivot(index="company_code", columns="source", values=values)
+    wide.columns = [
+        f"industry_{source}" if value == "stock_code" else f"industry_{source}_name"
+        for value, source in wide.columns
+    ]
+    wide.index.name = "stock_code"
+    return wide.reindex(stock_codes)
+
+
+def snapshot(date: str, metrics: list[str], **kwargs: any) -> pd.DataFrame:
+    """Get whole market snapshot of non-financial companies on date.
+
+    Companies are indexed by stock code, with their fundamental `metrics` and
+    industries. To build snapshots of many dates, reuse a `SnapshotPlan`.
+
+    Example:
+        >>> snapshot("2023-06-30", ["pe_ttm", "pb", "mc"])
+    """
+    return SnapshotPlan(metrics, **kwargs)(date)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import re
+from typing import Callable
+
+import pandas as pd
+
+from lixinger.cache import make_cache_key
+from lixinger.config import settings
+from lixinger.endpoint import get_endpoint_name
+
+
+class SeriesStore:
+    """Local store of time series, one pickle file per series."""
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        self.directory = pathlib.Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: tuple[str, ...]) -> pathlib.Path:
+        name = "__".join(re.sub(r"[^\w.-]", "_", part) for part in key)
+        return self.directory / f"{name}.pkl"
+
+    def load(self, key: tuple[str, ...]) -> pd.DataFrame | None:
+        try:
+            return pd.read_pickle(self._path(key))
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: tuple[str, ...], df: pd.DataFrame) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def delete(self, key: tuple[str, ...]) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+def get_series_key(
+    func: Callable, stock_code: str, kwargs: dict[str, any]
+) -> tuple[str, ...]:
+    """Get store key of series, by every fixed param of the request.
+
+    Params other than `type_`, e.g. the anchor of adjusted prices, are kept
+    as a digest, so each combination of them is stored as its own series.
+    """
+    endpoint = get_endpoint_name(func)
+    key = (endpoint, stock_code, str(kwargs.get("type_", "")))
+    params = {k: v for k, v in kwargs.items() if k != "type_" and v is not None}
+    if not params:
+        return key
+    digest = hashlib.sha256(make_cache_key(endpoint, params).encode()).hexdigest()
+    return (*key, digest[:16])
+
+
+def sync(
+    func: Callable,
+    stock_code: str,
+    start_date: str,
+    overlap: int = 7,
+    store: SeriesStore | None = None,
+    **kwargs: any,
+) -> pd.DataFrame:
+    """Sync time series of api function to local store, return full series.
+
+    Only the tail after the last stored date is requested, starting `overlap`
+    days earlier to catch revisions. Forward adjusted candlesticks change
+    entirely on every ex-rights date, so they are always requested in full.
+
+    Example:
+        >>> from lixinger.api.cn.company.candlestick import get_candlestick
+        >>> sync(get_candlestick, "600519", "2000-01-01", type_="ex_rights")
+    """
+    store = store or SeriesStore(settings.sync_dir)
+    key = get_series_key(func, stock_code, kwargs)
+    stored = store.load(key)
+
+    if (
+        stored is None
+        or stored.empty
+        or pd.Timestamp(start_date) < pd.Timestamp(stored.attrs["start_date"])
+        or kwargs.get("type_") in ("lxr_fc_rights", "fc_rights")
+    ):
+        df = func(stock_code=stock_code, start_date=start_date, **kwargs)
+        df = df.drop_duplicates(subset="date", keep="last")
+        df.attrs["start_date"] = start_date
+    else:
+        tail_start_date = stored["date"].max() - pd.Timedelta(days=overlap)
+        tail = func(
+            stock_code=stock_code,
+            start_date=tail_start_date.strftime("%Y-%m-%d"),
+            **kwargs,
+        )
+        df = pd.concat([stored[stored["date"] < tail_start_date], tail])
+        df = df.drop_duplicates(subset="date", keep="last")
+        df.attrs["start_date"] = stored.attrs["start_date"]
+    df = df.sort_values(by="date").reset_index(drop=True)
+    store.save(key, df)
+    return df[df["date"] >= pd.Timestamp(start_date)].reset_index(drop=True)
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
-import inspect
+import itertools
 import json
 import re
+import threading
+import time
 from collections import namedtuple
 from functools import lru_cache, wraps
 from typing import Callable, Type
@@ -10,17 +12,19 @@ from typing import Callable, Type
 import numpy as np
 import pandas as pd
 import pandera as pa
-import six
-from pydantic import validate_arguments
 from requests import Response
 
+from lixinger import metrics
 from lixinger.config import settings
+from lixinger.ratelimit import RateLimitError, get_rate_limiter
 
+CAMEL_CASE_PATTERN = re.compile(r"(?<!^)(?=[A-Z])")
 
+
+@lru_cache(maxsize=None)
 def camel_case_to_snake_case(name: str) -> str:
     """Convert camel case to snake case."""
-    pattern = re.compile(r"(?<!^)(?=[A-Z])")
-    name = pattern.sub("_", name).lower()
+    name = CAMEL_CASE_PATTERN.sub("_", name).lower()
     return name
 
 
@@ -30,96 +34,195 @@ def set_column_snake_case(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def convert_column_list_to_str(column: list[str]) -> str:
-    """Convert column list to string."""
-    try:
-        return ",".join(map(str, column))
-    except TypeError:
-        return np.NaN
-
-
 def get_response_data(response: Response) -> list[dict[str, any]]:
-    """Get response data from response."""
+    """Get response data from response.
+
+    Error codes in `rate_limit_codes` setting back off the rate limiter and
+    raise `RateLimitError`, other error codes raise `ValueError`.
+    """
     resp_json = response.json()
-    if resp_json.get("code") != 1:
-        raise ValueError(f"[{resp_json.get('code')}]{resp_json.get('error')}")
+    code = resp_json.get("code")
+    if code != 1:
+        metrics.emit("error", code=str(code))
+        message = f"[{code}]{resp_json.get('error')}"
+        if str(code) in map(str, settings.rate_limit_codes):
+            rate_limiter = get_rate_limiter()
+            if rate_limiter is not None:
+                rate_limiter.backoff()
+            raise RateLimitError(message)
+        raise ValueError(message)
     return resp_json["data"]
 
 
+def build_column(values: list[any], dtype: str) -> np.ndarray | pd.Index:
+    """Build column of given dtype from response values.
+
+    Missing values are kept, integer columns with missing values fall back to
+    float, values which can't be converted are kept as inferred by pandas.
+    Datetimes keep their local time, so ISO strings are parsed by numpy without
+    their utc offset.
+    """
+    if dtype == "datetime64[ns]":
+        try:
+            return np.array(
+                [None if value is None else value[:19] for value in values],
+                dtype="datetime64[s]",
+            ).astype(dtype)
+        except (TypeError, ValueError):
+            column = pd.DatetimeIndex(pd.to_datetime(pd.Series(values)))
+        return column.tz_localize(None) if column.tz is not None else column
+    if dtype == "str":
+        return pd.Series(
+            [
+                value if value is None or isinstance(value, (str, list)) else str(value)
+                for value in values
+            ],
+            dtype=object,
+        ).to_numpy()
+    if dtype == "bool" and None in values:
+        return pd.Series(values, dtype=object).to_numpy()
+    try:
+        return np.array(values, dtype=dtype)
+    except (TypeError, ValueError):
+        pass
+    if dtype.startswith("int"):
+        try:
+            return np.array(values, dtype="float64")
+        except (TypeError, ValueError):
+            pass
+    return pd.Series(values).to_numpy()
+
+
+@lru_cache(maxsize=None)
+def get_output_dtypes(output: Type[pa.DataFrameModel]) -> dict[str, str]:
+    """Get column dtypes of output model, built once per model."""
+    return {k: str(v) for k, v in output.to_schema().dtypes.items()}
+
+
+def compact_df(
+    df: pd.DataFrame,
+    output: Type[pa.DataFrameModel] | None = None,
+    float32: bool = False,
+    arrow: bool = False,
+) -> pd.DataFrame:
+    """Compact dataframe, driven by column dtypes of output model.
+
+    Low cardinality string columns become categoricals, integer columns
+    become nullable integers, float columns become float32 if `float32`, and
+    other columns become Arrow backed if `arrow`. Columns missing from
+    `output` are compacted by their inferred dtypes.
+    """
+    dtypes = get_output_dtypes(output) if output is not None else {}
+    columns = {}
+    for column, values in df.items():
+        dtype = dtypes.get(column, str(values.dtype))
+        if dtype in ("str", "object") and values.dtype == object:
+            try:
+                if values.nunique() <= len(values) // 2:
+                    values = values.astype("category")
+            except TypeError:
+                pass
+        elif dtype.startswith("int") and values.dtype.kind in "if":
+            try:
+                values = values.astype("Int64")
+            except TypeError:
+                pass
+        elif dtype.startswith("float") and values.dtype.kind == "f" and float32:
+            values = values.astype("float32")
+        columns[column] = values
+    df = pd.DataFrame(columns, index=df.index)
+
+    if arrow:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:  # pragma: no cover
+            raise ImportError(
+                "pyarrow is required for Arrow backed dtypes, "
+                "install it with `pip install lixinger[arrow]`"
+            ) from e
+        for column, values in df.items():
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                df[column] = values.convert_dtypes(
+                    convert_integer=False, dtype_backend="pyarrow"
+                )
+    return df
+
+
+def flatten_records(
+    data: list[dict[str, any]], record_path: str, meta: dict[str, str]
+) -> list[dict[str, any]]:
+    """Flatten nested list of records, keep `meta` fields renamed."""
+    return [
+        {**{new: row.get(old) for old, new in meta.items()}, **record}
+        for row in data
+        for record in row.get(record_path) or ()
+    ]
+
+
 def get_response_df(
-    response: Response, output: Type[pa.DataFrameModel]
+    response: Response,
+    output: Type[pa.DataFrameModel],
+    record_path: str | None = None,
+    meta: dict[str, str] | None = None,
 ) -> pd.DataFrame:
-    """Get response dataframe from response."""
+    """Get response dataframe from response.
+
+    Columns defined in `output` are built directly with their dtypes, other
+    columns are inferred, and nested ones are flattened by `pd.json_normalize`.
+    If `record_path` is given, records nested in it are flattened into rows,
+    with `meta` fields of the parent record renamed and kept.
+    """
+    start = time.perf_counter()
     data = get_response_data(response)
-    dtypes = {k: str(v) for k, v in output.to_schema().dtypes.items()}
+    if record_path is not None:
+        data = flatten_records(data, record_path, meta or {})
+    dtypes = get_output_dtypes(output)
     if not data:
         df = pd.DataFrame(columns=[*dtypes]).astype(dtypes)
     else:
-        df = pd.json_normalize(data)
-        df = set_column_snake_case(df)
-        missing_columns = set(dtypes.keys()) - set(df.columns)
-        if missing_columns:
-            df[list(missing_columns)] = np.NaN
-        df = df.astype(dtypes, errors="ignore")
-        for col, dtype in dtypes.items():
-            if dtype == "datetime64[ns]":
-                df[col] = pd.to_datetime(df[col]).dt.tz_localize(None)
+        df = pd.DataFrame(build_columns(data, dtypes))
+    metrics.emit("parse", seconds=time.perf_counter() - start, rows=len(df))
     return df
 
 
-def adjust_request_date_range(func: Callable) -> Callable:
-    """Adjust request date range."""
-
-    @wraps(func)
-    def wrapper(*args: any, **kwargs: any) -> Callable:
-        start_date_str = kwargs.get("start_date")
-        end_date_str = kwargs.get("end_date")
-        limit = kwargs.get("limit")
-
-        if start_date_str is None:
-            raise ValueError("start_date is required")
-        start_date = pd.Timestamp(start_date_str)
-
-        if end_date_str is None:
-            end_date = pd.Timestamp("today")
+def build_columns(
+    data: list[dict[str, any]], dtypes: dict[str, str]
+) -> dict[str, np.ndarray]:
+    """Build columns of response data, see `get_response_df`."""
+    columns = {}
+    for key in dict.fromkeys(itertools.chain.from_iterable(data)):
+        column = camel_case_to_snake_case(key)
+        values = [row.get(key) for row in data]
+        if column in dtypes:
+            columns[column] = build_column(values, dtypes[column])
+        elif any(isinstance(value, dict) for value in values):
+            nested = pd.json_normalize([{key: value} for value in values])
+            for nested_key in nested.columns:
+                columns[camel_case_to_snake_case(nested_key)] = nested[
+                    nested_key
+                ].to_numpy()
         else:
-            end_date = pd.Timestamp(end_date_str)
-
-        if start_date > end_date:
-            raise ValueError("start_date should be less than end_date")
-
-        dfs = pd.DataFrame()
-        while start_date < end_date:
-            new_end_date = start_date + pd.DateOffset(years=10)
-            query_params = {
-                **kwargs,
-                "start_date": start_date.strftime("%Y-%m-%d"),
-                "end_date": new_end_date.strftime("%Y-%m-%d"),
-            }
-            df = func(*args, **query_params)
-            dfs = pd.concat([dfs, df])
-            start_date = new_end_date + pd.Timedelta(days=1)
-
-            if limit is not None:
-                limit -= len(df)
-                if limit <= 0:
-                    break
-                kwargs["limit"] = limit
-        if "date" in dfs.columns:
-            dfs.sort_values(by="date", inplace=True)
-        return dfs
-
-    return wrapper
+            columns[column] = pd.Series(values).to_numpy()
+    for column, dtype in dtypes.items():
+        if column not in columns:
+            columns[column] = build_column([None] * len(data), dtype)
+    return columns
 
 
 Serialized = namedtuple("Serialized", "json")
 
 
-def hashable_cache(func: Callable | None = None, *, maxsize=16) -> Callable:
-    """Hashable cache."""
+def hashable_cache(
+    func: Callable | None = None, *, maxsize=16, endpoint: str | None = None
+) -> Callable:
+    """Hashable cache.
+
+    Hits and misses are emitted as `cache` events of `endpoint`.
+    """
 
     def hashable_cache_internal(_func: Callable) -> Callable:
         cache = lru_cache(maxsize)
+        local = threading.local()
 
         def deserialize(value) -> any:
             if isinstance(value, Serialized):
@@ -128,8 +231,9 @@ def hashable_cache(func: Callable | None = None, *, maxsize=16) -> Callable:
                 return value
 
         def func_with_serialized_params(*args: any, **kwargs: any) -> Callable:
+            local.miss = True
             _args = tuple([deserialize(arg) for arg in args])
-            _kwargs = {k: deserialize(v) for k, v in six.viewitems(kwargs)}
+            _kwargs = {k: deserialize(v) for k, v in kwargs.items()}
             return _func(*_args, **_kwargs)
 
         cached_func = cache(func_with_serialized_params)
@@ -150,7 +254,10 @@ def hashable_cache(func: Callable | None = None, *, maxsize=16) -> Callable:
                 else v
                 for k, v in kwargs.items()
             }
-            return cached_func(*_args, **_kwargs)
+            local.miss = False
+            result = cached_func(*_args, **_kwargs)
+            metrics.emit("cache", endpoint, layer="memory", hit=not local.miss)
+            return result
 
         hashable_cached_func.cache_info = cached_func.cache_info
         hashable_cached_func.cache_clear = cached_func.cache_clear
@@ -161,25 +268,5 @@ def hashable_cache(func: Callable | None = None, *, maxsize=16) -> Callable:
     return hashable_cache_internal
 
 
-def api(func: Callable | None = None, *, maxsize=16) -> Callable:
-    """API decorator."""
-
-    def wrapper(_func: Callable) -> Callable:
-        @hashable_cache(maxsize=maxsize)
-        @validate_arguments
-        @wraps(_func)
-        def _api(*args: any, **kwargs: any) -> Callable:
-            parameters = inspect.signature(_func).parameters
-            if "start_date" in parameters and "end_date" in parameters:
-                return adjust_request_date_range(_func)(*args, **kwargs)
-            return _func(*args, **kwargs)
-
-        return _api
-
-    if func is not None:
-        return wrapper(func)
-    return wrapper
-
-
 def set_token(token: str) -> None:
     settings.token = token
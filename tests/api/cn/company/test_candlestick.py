@@ -1,5 +1,22 @@
+import asyncio
+
 from lixinger.api.cn.company.candlestick import get_candlestick
 
 
 def test_get_candlestick() -> None:
     get_candlestick(type_="ex_rights", start_date="2021-01-01", stock_code="600519")
+
+
+def test_get_candlestick_aio() -> None:
+    asyncio.run(
+        get_candlestick.aio(
+            type_="ex_rights", start_date="2021-01-01", stock_code="600519"
+        )
+    )
+
+
+def test_get_candlestick_iter() -> None:
+    for _ in get_candlestick.iter(
+        type_="ex_rights", start_date="2000-01-01", stock_code="600519"
+    ):
+        pass
@@ -1,9 +1,62 @@
+import pathlib
 import time
 
 import pytest
 
+from benchmarks.server import FakeLixingerServer
+from lixinger import ratelimit
+from lixinger.cassette import use_cassette
+from lixinger.config import settings
+from lixinger.endpoint import cache_clear
+
+TESTS_DIR = pathlib.Path(__file__).resolve().parent
+CASSETTES_DIR = TESTS_DIR / "cassettes"
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--cassette",
+        choices=["record", "replay", "once"],
+        default=None,
+        help="record requests of api tests to cassettes, or replay them offline",
+    )
+
+
+@pytest.fixture(autouse=True)
+def cassette(request):
+    mode = request.config.getoption("--cassette")
+    path = pathlib.Path(request.node.path).resolve()
+    if mode is None or TESTS_DIR / "api" not in path.parents:
+        yield None
+        return
+    cassette_path = (
+        CASSETTES_DIR
+        / path.relative_to(TESTS_DIR).with_suffix("")
+        / f"{request.node.name}.json.gz"
+    )
+    with use_cassette(cassette_path, mode) as cassette:
+        yield cassette
+
 
 @pytest.fixture(autouse=True)
-def slow_down_tests():
+def slow_down_tests(cassette):
     yield
-    time.sleep(0.5)
+    # Replayed tests send no request, so they don't need to be rate limited.
+    if cassette is None or cassette.recording:
+        time.sleep(0.5)
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """Send requests to a local `FakeLixingerServer`, without rate limit.
+
+    Memory caches of api functions are cleared, as their keys don't include
+    `base_url`. Payload sizes can be changed by the `size` of the server.
+    """
+    with FakeLixingerServer() as server:
+        monkeypatch.setattr(settings, "base_url", server.base_url)
+        monkeypatch.setattr(settings, "rate_limit", 0)
+        monkeypatch.setattr(ratelimit, "_rate_limiter", None)
+        cache_clear()
+        yield server
+    cache_clear()
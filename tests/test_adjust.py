@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from lixinger.adjust import AdjustmentEngine
+
+
+def make_engine() -> AdjustmentEngine:
+    candlestick = pd.DataFrame(
+        {
+            "date": pd.date_range("2023-01-02", periods=6),
+            "open": [10.0, 10.0, 4.5, 5.0, 4.0, 4.0],
+            "high": [10.0, 10.0, 4.5, 5.0, 4.0, 4.0],
+            "low": [10.0, 10.0, 4.5, 5.0, 4.0, 4.0],
+            "close": [10.0, 10.0, 4.5, 5.0, 4.0, 4.0],
+            "volume": 100,
+        }
+    )
+    # 10送10派10元 on 2023-01-04, 派1元 on 2023-01-06.
+    dividends = pd.DataFrame(
+        {
+            "ex_date": pd.to_datetime(["2023-01-04", "2023-01-06", None]),
+            "dividend": [1.0, 1.0, 2.0],
+            "bonus_shares_from_profit": [10, 0, 0],
+            "bonus_shares_from_capital_reserve": [0, 0, 0],
+            "split_ratio": [None, None, None],
+        }
+    )
+    return AdjustmentEngine("600519", candlestick, dividends)
+
+
+def test_adjust() -> None:
+    engine = make_engine()
+    fc = engine.adjust("fc_rights")["close"].to_numpy()
+    np.testing.assert_allclose(fc, [3.5, 3.5, 3.5, 4.0, 4.0, 4.0])
+    bc = engine.adjust("bc_rights")["close"].to_numpy()
+    np.testing.assert_allclose(bc, [10, 10, 10, 11, 11, 11])
+    lxr = engine.adjust("lxr_fc_rights")["close"].to_numpy()
+    np.testing.assert_allclose(lxr, [3.6, 3.6, 3.6, 4.0, 4.0, 4.0])
+
+    anchored = engine.adjust("fc_rights", adjust_forward_date="2023-01-04")
+    np.testing.assert_allclose(anchored["close"], [4.5, 4.5, 4.5, 5.0, 5.0, 5.0])
+    assert anchored["volume"].tolist() == [100] * 6
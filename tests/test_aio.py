@@ -0,0 +1,27 @@
+import asyncio
+
+import pandas as pd
+
+from lixinger import aio
+from lixinger.api.cn.company.candlestick import get_candlestick
+
+
+def test_get_candlestick_aio(fake_server) -> None:
+    kwargs = {
+        "type_": "ex_rights",
+        "start_date": "2005-01-01",
+        "end_date": "2023-06-30",
+        "stock_code": "600519",
+    }
+    expected = get_candlestick(**kwargs)
+    requests = fake_server.requests
+
+    async def main() -> pd.DataFrame:
+        try:
+            return await get_candlestick.aio(**kwargs)
+        finally:
+            await aio.close_client()
+
+    df = asyncio.run(main())
+    assert fake_server.requests == 2 * requests == 4
+    assert df.equals(expected)
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+from lixinger.analytics import drawdown, max_drawdown, period_returns
+
+
+def make_prices() -> pd.DataFrame:
+    dates = pd.bdate_range("2020-01-01", "2021-12-31")
+    rng = np.random.default_rng(0)
+    values = np.exp(np.cumsum(rng.normal(0, 0.02, (len(dates), 3)), axis=0))
+    prices = pd.DataFrame(values, index=dates, columns=["000300", "000905", "000016"])
+    prices.iloc[:50, 2] = np.nan
+    return prices
+
+
+def test_drawdown() -> None:
+    prices = make_prices()
+    df = drawdown(prices, "q")
+    for date in prices.index[::37]:
+        window = prices.loc[date - pd.DateOffset(months=3) : date]
+        expected = prices.loc[date] / window.max() - 1
+        np.testing.assert_allclose(df.loc[date], expected)
+
+
+def test_max_drawdown() -> None:
+    prices = make_prices()
+    df = max_drawdown(prices)
+    for code in prices.columns:
+        drawdowns = prices[code] / prices[code].cummax() - 1
+        assert np.isclose(df.loc[code, "max_drawdown"], drawdowns.min())
+        assert df.loc[code, "trough_date"] == drawdowns.idxmin()
+        assert df.loc[code, "peak_date"] == prices[code][: drawdowns.idxmin()].idxmax()
+
+
+def test_period_returns() -> None:
+    prices = make_prices()
+    df = period_returns(prices, "M")
+    expected = prices["000300"].resample("M").last().pct_change()
+    np.testing.assert_allclose(df["000300"].iloc[1:], expected.iloc[1:])
+    first = prices.loc["2020-01", "000300"]
+    assert np.isclose(df["000300"].iloc[0], first.iloc[-1] / first.iloc[0] - 1)
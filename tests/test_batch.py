@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from lixinger.api.cn.company.candlestick import get_candlestick
+from lixinger.batch import fetch_panel, fetch_partitions
+
+
+def get_candlestick_or_fail(stock_code: str, **kwargs: any) -> pd.DataFrame:
+    if stock_code == "000000":
+        raise ValueError("unknown stock")
+    return get_candlestick(stock_code=stock_code, **kwargs)
+
+
+def test_fetch_panel(fake_server, tmp_path) -> None:
+    stock_codes = ["600519", "000000", "000001", "600000"]
+    kwargs = {"type_": "ex_rights", "start_date": "2022-01-01"}
+    panel = fetch_panel(get_candlestick_or_fail, stock_codes, **kwargs)
+    manifest = fetch_partitions(
+        get_candlestick_or_fail, stock_codes, tmp_path, **kwargs
+    )
+
+    assert panel.columns[:2].tolist() == ["stock_code", "date"]
+    assert panel["stock_code"].unique().tolist() == ["600519", "000001", "600000"]
+    assert list(panel.attrs["errors"]) == ["000000"]
+    assert manifest["error"].notna().tolist() == [False, True, False, False]
+    df = pd.read_pickle(manifest["path"][0]).reset_index(drop=True)
+    assert df.equals(panel[panel["stock_code"] == "600519"].iloc[:, 1:])
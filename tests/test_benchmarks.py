@@ -0,0 +1,8 @@
+from lixinger.api.cn.index.candlestick import get_candlestick
+
+
+def test_fake_server(fake_server) -> None:
+    df = get_candlestick(type_="normal", start_date="2000-01-01", stock_code="000300")
+    assert fake_server.requests > 1
+    assert df["date"].is_monotonic_increasing
+    assert df["date"].is_unique
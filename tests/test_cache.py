@@ -0,0 +1,101 @@
+import pandas as pd
+
+from lixinger import cache as cache_module
+from lixinger.cache import (
+    SQLiteCache,
+    SubsetCache,
+    is_immutable,
+    make_cache_key,
+    merge_intervals,
+    subtract_intervals,
+)
+from lixinger.config import settings
+
+
+def test_sqlite_cache(tmp_path) -> None:
+    cache = SQLiteCache(tmp_path)
+    key = make_cache_key("cn/company", {"stock_codes": ["600519"]})
+    df = pd.DataFrame({"stock_code": ["600519"]})
+    assert cache.get(key) is None
+    cache.set(key, df)
+    assert cache.get(key).equals(df)
+    cache.set(key, df, ttl=-1)
+    assert cache.get(key) is None
+
+
+def test_is_immutable() -> None:
+    assert is_immutable({"start_date": "2010-01-01", "end_date": "2011-01-01"})
+    assert not is_immutable({"start_date": "2010-01-01", "end_date": None})
+    assert not is_immutable({"date": "latest"})
+    assert not is_immutable({"type_": "fc_rights", "end_date": "2011-01-01"})
+
+
+def test_intervals() -> None:
+    day = pd.Timestamp
+    intervals = merge_intervals([], day("2023-01-01"), day("2023-01-10"))
+    intervals = merge_intervals(intervals, day("2023-01-11"), day("2023-01-20"))
+    intervals = merge_intervals(intervals, day("2023-02-01"), day("2023-02-10"))
+    assert intervals == [
+        (day("2023-01-01"), day("2023-01-20")),
+        (day("2023-02-01"), day("2023-02-10")),
+    ]
+    assert subtract_intervals(intervals, day("2022-12-25"), day("2023-02-05")) == [
+        (day("2022-12-25"), day("2022-12-31")),
+        (day("2023-01-21"), day("2023-01-31")),
+    ]
+    assert subtract_intervals(intervals, day("2023-01-05"), day("2023-01-15")) == []
+
+
+def test_subset_cache() -> None:
+    cache = SubsetCache()
+    start, end = pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-31")
+    dates = pd.date_range(start, end)
+    df = pd.DataFrame({"date": dates, "pe_ttm": 1.0, "mc": 2.0})
+    cache.update("key", "600519", df, ["pe_ttm", "mc"], start, end)
+    assert cache.missing("key", "600519", ["mc"], start, end) == {}
+    assert cache.missing("key", "600519", ["pb"], start, end) == {"pb": [(start, end)]}
+    assert cache.missing("key", "000001", ["mc"], start, start) == {
+        "mc": [(start, start)]
+    }
+    rows = cache.get("key", "600519", ["mc"], dates[5], dates[9])
+    assert rows.columns.tolist() == ["date", "mc"]
+    assert rows["date"].tolist() == dates[5:10].tolist()
+
+
+def test_subset_cache_persistent(tmp_path) -> None:
+    start, end = pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-31")
+    df = pd.DataFrame({"date": pd.date_range(start, end), "mc": 2.0})
+    SubsetCache(tmp_path).update("key", "600519", df, ["mc"], start, end)
+
+    cache = SubsetCache(tmp_path)
+    assert cache.missing("key", "600519", ["mc"], start, end) == {}
+    assert cache.get("key", "600519", ["mc"], start, end).equals(df)
+    cache.clear()
+    assert SubsetCache(tmp_path).get("key", "600519", ["mc"], start, end) is None
+
+
+def test_get_cache(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(cache_module, "_cache", None)
+    monkeypatch.setattr(cache_module, "_cache_dir", None)
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "a"))
+    assert cache_module.get_cache().directory == tmp_path / "a"
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path / "b"))
+    assert cache_module.get_cache().directory == tmp_path / "b"
+    monkeypatch.setattr(settings, "cache_dir", "")
+    assert cache_module.get_cache() is None
+
+    custom = SQLiteCache(tmp_path / "c")
+    cache_module.set_cache(custom)
+    assert cache_module.get_cache() is custom
+
+
+def test_get_subset_cache(monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(cache_module, "_subset_cache", None)
+    monkeypatch.setattr(cache_module, "_subset_cache_dir", None)
+    monkeypatch.setattr(settings, "subset_cache", True)
+    monkeypatch.setattr(settings, "cache_dir", "")
+    assert cache_module.get_subset_cache().directory is None
+    monkeypatch.setattr(settings, "cache_dir", str(tmp_path))
+    assert cache_module.get_subset_cache().directory == tmp_path / "subset"
+    monkeypatch.setattr(settings, "subset_cache", False)
+    assert cache_module.get_subset_cache() is None
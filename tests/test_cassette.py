@@ -0,0 +1,35 @@
+import asyncio
+import gzip
+
+import pytest
+
+from lixinger import client
+from lixinger.api.cn.index.candlestick import get_candlestick
+from lixinger.cassette import CassetteError, use_cassette
+from lixinger.config import settings
+
+
+def test_cassette(fake_server, monkeypatch, tmp_path) -> None:
+    monkeypatch.setattr(settings, "token", "secret")
+    path = tmp_path / "candlestick.json.gz"
+    kwargs = {
+        "stock_code": "000300",
+        "type_": "normal",
+        "start_date": "2010-01-01",
+        "end_date": "2023-06-30",
+    }
+    with use_cassette(path, "record") as cassette:
+        expected = get_candlestick(**kwargs)
+    assert len(cassette.interactions) == 2
+    assert b"secret" not in gzip.decompress(path.read_bytes())
+
+    monkeypatch.setattr(settings, "base_url", "http://127.0.0.1:1")
+    get_candlestick.cache_clear()
+    with use_cassette(path) as cassette:
+        assert not cassette.recording
+        assert get_candlestick(**kwargs).equals(expected)
+        df = asyncio.run(get_candlestick.aio(**kwargs))
+        assert df.equals(expected)
+        with pytest.raises(CassetteError):
+            get_candlestick(**{**kwargs, "end_date": "2023-07-31"})
+    assert client.get_transport() is None
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+import requests
+from requests import Response
+
+from lixinger import client, ratelimit
+from lixinger.config import settings
+from lixinger.metrics import registry
+
+
+def make_response(status_code: int) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response._content = b'{"code": 1, "data": []}'
+    return response
+
+
+class FakeSession:
+    def __init__(self, responses: list[any], delays: list[float] | None = None):
+        self.responses = responses
+        self.delays = delays or []
+        self.calls = []
+
+    def post(self, url: str, **kwargs: any) -> Response:
+        i = len(self.calls)
+        self.calls.append(kwargs)
+        if i < len(self.delays):
+            time.sleep(self.delays[i])
+        response = self.responses[min(i, len(self.responses) - 1)]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def fake_settings(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "retry_backoff", 0)
+    monkeypatch.setattr(ratelimit, "_rate_limiter", None)
+    monkeypatch.setattr(settings, "rate_limit", 0)
+    client.latencies.clear()
+
+
+def test_send_timeout(monkeypatch) -> None:
+    session = FakeSession([make_response(200)])
+    monkeypatch.setattr(client, "get_session", lambda: session)
+    monkeypatch.setattr(settings, "timeouts", {"cn/company": 120})
+    client.send(f"{settings.base_url}/cn/index")
+    client.send(f"{settings.base_url}/cn/company")
+    assert [call["timeout"] for call in session.calls] == [(5, 60), (5, 120)]
+
+
+def test_send_retry(monkeypatch) -> None:
+    session = FakeSession(
+        [requests.exceptions.ConnectionError(), make_response(502), make_response(200)]
+    )
+    monkeypatch.setattr(client, "get_session", lambda: session)
+    response = client.send(f"{settings.base_url}/cn/company/retry")
+    assert response.status_code == 200
+    assert len(session.calls) == 3
+    assert registry.get(
+        "lixinger_retries_total", endpoint="cn/company/retry", exception="ServerError"
+    )
+
+
+def test_send_hedge(monkeypatch) -> None:
+    session = FakeSession([make_response(200)], delays=[2, 0])
+    monkeypatch.setattr(client, "get_session", lambda: session)
+    monkeypatch.setattr(settings, "hedge", True)
+    monkeypatch.setattr(settings, "hedge_min_samples", 1)
+    client.latencies.observe("cn/company/hedge", 0.1)
+    start = time.perf_counter()
+    client.send(f"{settings.base_url}/cn/company/hedge")
+    assert time.perf_counter() - start < 1
+    assert len(session.calls) == 2
+    assert registry.get("lixinger_hedged_requests_total", endpoint="cn/company/hedge")
+
+
+def test_wait_backoff(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "retry_backoff", 1)
+
+    class RetryState:
+        attempt_number = 10
+
+    assert 0 <= client.wait_backoff(RetryState()) <= settings.retry_max_wait
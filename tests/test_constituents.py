@@ -0,0 +1,23 @@
+from lixinger.constituents import ConstituentsHistory
+
+
+def test_constituents_history(fake_server, tmp_path) -> None:
+    fake_server.size["constituents"] = 10
+    history = ConstituentsHistory.build(
+        ["000300", "000905"], "2022-01-01", "2022-12-31"
+    )
+    # One stock is replaced every quarter.
+    assert len(history.events) == 2 * (10 + 3 * 2)
+    assert len(history.snapshots) == 2
+    assert history.members("000300", "2022-02-01") == [
+        f"{600000 + i}" for i in range(1, 11)
+    ]
+    assert history.members("000300", "2022-12-31")[0] == "600004"
+    assert history.indices("600001", "2022-02-01") == ["000300", "000905"]
+    assert history.indices("600001", "2022-06-01") == []
+
+    history.save(tmp_path / "history.pkl")
+    loaded = ConstituentsHistory.load(tmp_path / "history.pkl")
+    assert loaded.members("000905", "2022-06-01") == history.members(
+        "000905", "2022-06-01"
+    )
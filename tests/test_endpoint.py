@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from lixinger import endpoint as endpoint_module
+from lixinger.api.cn.company.candlestick import Output, get_candlestick
+from lixinger.api.cn.company.fundamental_non_financial import (
+    get_fundamental_non_financial,
+)
+from lixinger.config import settings
+from lixinger.endpoint import (
+    ChunkedRequestError,
+    adjust_request_date_range,
+    bounded,
+    endpoints,
+    iter_request,
+    merge_chunks,
+    plan_request_chunks,
+    plan_request_date_range,
+    retry_rate_limited,
+    split_request,
+    split_request_async,
+)
+from lixinger.ratelimit import RateLimitError
+
+
+def test_plan_request_date_range() -> None:
+    windows = plan_request_date_range(
+        {"start_date": "1990-01-01", "end_date": "2020-06-30", "stock_code": "000300"}
+    )
+    assert [(w["start_date"], w["end_date"]) for w in windows] == [
+        ("1990-01-01", "2000-01-01"),
+        ("2000-01-02", "2010-01-02"),
+        ("2010-01-03", "2020-01-03"),
+        ("2020-01-04", "2020-06-30"),
+    ]
+
+
+def test_plan_request_chunks() -> None:
+    groups = plan_request_chunks(
+        {"stock_codes": list("abc"), "metrics_list": list("xyz"), "date": "latest"},
+        {"stock_codes": 2, "metrics_list": 2},
+    )
+    assert [[(p["stock_codes"], p["metrics_list"]) for p in g] for g in groups] == [
+        [(["a", "b"], ["x", "y"]), (["a", "b"], ["z"])],
+        [(["c"], ["x", "y"]), (["c"], ["z"])],
+    ]
+
+
+def test_plan_request_date_range_newest_first() -> None:
+    windows = plan_request_date_range(
+        {"start_date": "1990-01-01", "end_date": "2020-06-30", "stock_code": "000300"},
+        newest_first=True,
+    )
+    assert [(w["start_date"], w["end_date"]) for w in windows] == [
+        ("2010-06-30", "2020-06-30"),
+        ("2000-06-29", "2010-06-29"),
+        ("1990-06-28", "2000-06-28"),
+        ("1990-01-01", "1990-06-27"),
+    ]
+
+
+def test_adjust_request_date_range_limit() -> None:
+    calls = []
+
+    def func(start_date: str, end_date: str, limit: int) -> pd.DataFrame:
+        calls.append(start_date)
+        # Windows overlap by one day, like windows returning the boundary bar.
+        dates = pd.bdate_range(
+            pd.Timestamp(start_date) - pd.Timedelta(days=1), end_date
+        )[-limit:]
+        return pd.DataFrame({"date": dates, "close": range(len(dates))})
+
+    request = adjust_request_date_range(func)
+    df = request(start_date="1990-01-01", end_date="2020-06-30", limit=20)
+    assert calls == ["2010-06-30"]
+    assert df["date"].tolist() == list(pd.bdate_range(end="2020-06-30", periods=20))
+
+    calls.clear()
+    df = request(start_date="2019-01-01", end_date="2020-06-30", limit=10000)
+    assert len(calls) == 1
+    df = request(start_date="1990-01-01", end_date="2020-06-30", limit=3000)
+    assert len(df) == 3000
+    assert df["date"].is_unique
+    assert df["date"].iloc[-1] == pd.Timestamp("2020-06-30")
+
+
+def test_retry_rate_limited(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "retry_backoff", 0)
+    calls = []
+
+    def func() -> int:
+        calls.append(1)
+        if len(calls) < 2:
+            raise RateLimitError("[429]")
+        return 42
+
+    assert retry_rate_limited(func, endpoint="cn/company")() == 42
+    assert len(calls) == 2
+
+
+def test_endpoints() -> None:
+    endpoint = endpoints["cn/company/candlestick"]
+    assert get_candlestick.endpoint is endpoint
+    assert endpoint.output is Output
+    assert endpoint.windowed
+    assert not endpoint.chunks
+
+    endpoint = get_fundamental_non_financial.endpoint
+    assert endpoints[endpoint.name] is endpoint
+    assert endpoint.chunks == {"stock_codes": 100, "metrics_list": 48}
+    assert endpoint.subset
+
+
+def test_adjust_request_date_range() -> None:
+    calls = []
+
+    def func(**kwargs: any) -> pd.DataFrame:
+        calls.append(kwargs)
+        if "date" in kwargs:
+            return pd.DataFrame({"date": [pd.Timestamp(kwargs["date"])]})
+        dates = pd.bdate_range(kwargs["start_date"], kwargs["end_date"])
+        return pd.DataFrame({"date": dates})
+
+    request = adjust_request_date_range(func)
+    df = request(start_date="1990-01-01", end_date="2020-06-30")
+    assert [(c["start_date"], c["end_date"]) for c in calls] == [
+        (w["start_date"], w["end_date"])
+        for w in plan_request_date_range(
+            {"start_date": "1990-01-01", "end_date": "2020-06-30"}
+        )
+    ]
+    assert calls[-1]["end_date"] == "2020-06-30"
+    assert df["date"].is_unique and df["date"].is_monotonic_increasing
+
+    calls.clear()
+    request(start_date="2020-06-30", end_date="2020-06-30")
+    assert calls == [{"start_date": "2020-06-30", "end_date": "2020-06-30"}]
+
+    calls.clear()
+    request(date="2020-06-30", stock_codes=["600519"])
+    assert calls == [{"date": "2020-06-30", "stock_codes": ["600519"]}]
+
+
+class ConcurrencyProbe:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, **kwargs: any) -> pd.DataFrame:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return pd.DataFrame({"stock_code": kwargs["stock_codes"]})
+
+
+def test_adjust_request_date_range_concurrent(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "max_workers", 4)
+    probe = ConcurrencyProbe()
+    adjust_request_date_range(probe)(
+        stock_codes=["600519"], start_date="1980-01-01", end_date="2020-01-01"
+    )
+    assert probe.max_running == 4
+
+
+def test_bounded_nested_pools(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "max_workers", 2)
+    monkeypatch.setattr(endpoint_module, "_request_slots", None)
+    probe = ConcurrencyProbe()
+    request = split_request(
+        adjust_request_date_range(bounded(probe)), {"stock_codes": 1}
+    )
+    df = request(
+        stock_codes=["600519", "000001", "600000"],
+        start_date="1980-01-01",
+        end_date="2020-01-01",
+    )
+    assert len(df) == 12
+    assert probe.max_running == 2
+
+
+def test_merge_chunks() -> None:
+    groups = plan_request_chunks(
+        {"stock_codes": ["a"], "metrics_list": ["x", "y"], "date": "latest"},
+        {"metrics_list": 1},
+    )
+    date = pd.Timestamp("2023-01-03")
+    results = [
+        [
+            pd.DataFrame({"stock_code": ["a"], "date": [date], "x": [1.0]}),
+            pd.DataFrame({"stock_code": ["a"], "date": [date], "y": [2.0]}),
+        ]
+    ]
+    df = merge_chunks(groups, results)
+    assert df.to_dict("records") == [
+        {"stock_code": "a", "date": date, "x": 1.0, "y": 2.0}
+    ]
+
+
+def test_split_request_error() -> None:
+    def func(stock_codes: list[str], date: str) -> pd.DataFrame:
+        if stock_codes == ["b"]:
+            raise ValueError("error")
+        return pd.DataFrame({"stock_code": stock_codes})
+
+    with pytest.raises(ChunkedRequestError) as e:
+        split_request(func, {"stock_codes": 1})(stock_codes=list("abc"), date="latest")
+    assert e.value.errors[0][0]["stock_codes"] == ["b"]
+    assert e.value.df["stock_code"].tolist() == ["a", "c"]
+
+
+def test_split_request_async_cancelled() -> None:
+    async def func(stock_codes: list[str], date: str) -> pd.DataFrame:
+        if stock_codes == ["b"]:
+            raise asyncio.CancelledError()
+        return pd.DataFrame({"stock_code": stock_codes})
+
+    request = split_request_async(func, {"stock_codes": 1})
+    with pytest.raises(ChunkedRequestError) as e:
+        asyncio.run(request(stock_codes=list("abc"), date="latest"))
+    assert isinstance(e.value.errors[0][1], asyncio.CancelledError)
+    assert e.value.df["stock_code"].tolist() == ["a", "c"]
+
+
+def test_iter_request(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "max_workers", 2)
+    calls = []
+
+    def func(
+        stock_codes: list[str], metrics_list: list[str], start_date: str, end_date: str
+    ) -> pd.DataFrame:
+        calls.append(start_date)
+        dates = pd.bdate_range(start_date, end_date)
+        return pd.DataFrame(
+            {"date": dates, "stock_code": stock_codes[0], metrics_list[0]: 1.0}
+        )
+
+    request = iter_request(func, windowed=True, chunks={"metrics_list": 1})
+    results = request(
+        stock_codes=["600519"],
+        metrics_list=["pe_ttm", "mc"],
+        start_date="1990-01-01",
+        end_date="2020-06-30",
+    )
+    df = next(results)
+    time.sleep(0.1)
+    # Only the units requested ahead are started, each by every metric chunk.
+    assert sorted(set(calls)) == ["1990-01-01", "2000-01-02"]
+    assert len(calls) == 4
+    assert df.columns.tolist() == ["date", "stock_code", "pe_ttm", "mc"]
+    assert df["date"].iloc[0] == pd.Timestamp("1990-01-01")
+
+    dfs = [df, *results]
+    assert len(dfs) == 4
+    assert pd.concat(dfs)["date"].is_monotonic_increasing
+    assert len(calls) == 8
+
+
+def test_iter_request_limit() -> None:
+    calls = []
+
+    def func(start_date: str, end_date: str, limit: int) -> pd.DataFrame:
+        calls.append(start_date)
+        dates = pd.bdate_range(start_date, end_date)[-limit:]
+        return pd.DataFrame({"date": dates})
+
+    request = iter_request(func, windowed=True)
+    dfs = list(request(start_date="1990-01-01", end_date="2020-06-30", limit=20))
+    assert calls == ["2010-06-30"]
+    assert len(dfs) == 1
+    assert dfs[0]["date"].tolist() == list(pd.bdate_range(end="2020-06-30", periods=20))
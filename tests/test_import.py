@@ -0,0 +1,15 @@
+import subprocess
+import sys
+
+
+def test_lazy_import() -> None:
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, lixinger.api.cn.company, lixinger.api.cn.index, "
+            "lixinger.api.cn.fund, lixinger.config; "
+            "assert not {'pandas', 'pandera', 'dynaconf'} & set(sys.modules)",
+        ],
+        check=True,
+    )
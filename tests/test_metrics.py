@@ -0,0 +1,46 @@
+from benchmarks.server import FakeLixingerServer
+from lixinger.api.cn.index.candlestick import get_candlestick
+from lixinger.config import settings
+from lixinger.metrics import MetricsRegistry, add_hook, registry, remove_hook
+
+
+def test_to_prometheus() -> None:
+    metrics = MetricsRegistry()
+    metrics.inc("requests_total", endpoint="cn/company")
+    metrics.inc("requests_total", endpoint="cn/company")
+    metrics.observe("duration_seconds", 0.2, endpoint="cn/company")
+    text = metrics.to_prometheus()
+    assert 'requests_total{endpoint="cn/company"} 2' in text
+    assert 'duration_seconds_bucket{endpoint="cn/company",le="0.1"} 0' in text
+    assert 'duration_seconds_bucket{endpoint="cn/company",le="0.25"} 1' in text
+    assert 'duration_seconds_count{endpoint="cn/company"} 1' in text
+
+
+def test_metrics(monkeypatch) -> None:
+    events = []
+
+    def hook(event: str, endpoint: str, **data: any) -> None:
+        events.append((event, endpoint))
+
+    registry.clear()
+    add_hook(hook)
+    kwargs = {"type_": "normal", "start_date": "2000-01-01", "stock_code": "000300"}
+    try:
+        with FakeLixingerServer() as server:
+            monkeypatch.setattr(settings, "base_url", server.base_url)
+            get_candlestick.cache_clear()
+            df = get_candlestick(**kwargs)
+            get_candlestick(**kwargs)
+            get_candlestick.cache_clear()
+    finally:
+        remove_hook(hook)
+
+    endpoint = "cn/index/candlestick"
+    labels = {"endpoint": endpoint, "status": "200"}
+    assert registry.get("lixinger_requests_total", **labels) == server.requests
+    assert registry.get("lixinger_rows_total", endpoint=endpoint) == len(df)
+    assert registry.get("lixinger_response_bytes_total", endpoint=endpoint) > 0
+    for result in ("hit", "miss"):
+        labels = {"endpoint": endpoint, "layer": "memory", "result": result}
+        assert registry.get("lixinger_cache_requests_total", **labels) == 1
+    assert ("request", endpoint) in events
@@ -0,0 +1,16 @@
+from lixinger.ratelimit import RateLimiter
+
+
+def test_rate_limiter() -> None:
+    rate_limiter = RateLimiter(10, burst=2)
+    assert rate_limiter.reserve() == 0
+    assert rate_limiter.reserve() == 0
+    assert 0 < rate_limiter.reserve() <= 0.1
+    rate_limiter.backoff()
+    assert rate_limiter._state["rate"] == 5
+
+
+def test_rate_limiter_lock_file(tmp_path) -> None:
+    lock_file = tmp_path / "rate_limit.lock"
+    RateLimiter(10, burst=1, lock_file=lock_file).reserve()
+    assert RateLimiter(10, burst=1, lock_file=lock_file).reserve() > 0
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from lixinger.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_single_flight() -> None:
+    single_flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def func() -> int:
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    def call() -> tuple[int, bool]:
+        barrier.wait()
+        return single_flight.do("key", func)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: call(), range(8)))
+    assert len(calls) == 1
+    assert [result for result, _ in results] == [42] * 8
+    assert sum(shared for _, shared in results) == 7
+    assert single_flight.do("key", func) == (42, False)
+
+
+def test_single_flight_exception() -> None:
+    def func() -> None:
+        raise ValueError("error")
+
+    with pytest.raises(ValueError):
+        SingleFlight().do("key", func)
+
+
+def test_async_single_flight() -> None:
+    calls = []
+
+    async def func() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return 42
+
+    async def main() -> list[tuple[int, bool]]:
+        single_flight = AsyncSingleFlight()
+        return await asyncio.gather(*(single_flight.do("key", func) for _ in range(8)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert sum(shared for _, shared in results) == 7
+
+
+def test_async_single_flight_cancel_leader() -> None:
+    calls = []
+
+    async def func() -> int:
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return 42
+
+    async def main() -> None:
+        single_flight = AsyncSingleFlight()
+        leader = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await follower == (42, True)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        # The call is cancelled once its last caller is cancelled.
+        only = asyncio.ensure_future(single_flight.do("key", func))
+        await asyncio.sleep(0.01)
+        only.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await only
+        assert await single_flight.do("key", func) == (42, False)
+
+    asyncio.run(main())
+    assert len(calls) == 3
@@ -0,0 +1,15 @@
+from lixinger.snapshot import SnapshotPlan
+
+
+def test_snapshot(fake_server) -> None:
+    fake_server.size["stocks"] = 250
+    plan = SnapshotPlan(["pe_ttm", "mc"])
+    df = plan("2023-06-30")
+    requests = fake_server.requests
+    plan("2023-07-03")
+    assert requests == 1 + 3 + 250
+    assert fake_server.requests == requests + 3
+    assert len(df) == 250
+    assert df.index.name == "stock_code"
+    assert {"pe_ttm", "mc", "industry_sw", "industry_sw_2021"} <= set(df.columns)
+    assert df["market"].dtype == "category"
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from lixinger.sync import SeriesStore, sync
+
+requests = []
+
+
+def get_series(stock_code: str, start_date: str) -> pd.DataFrame:
+    requests.append(start_date)
+    dates = pd.date_range(start_date, "2023-01-10")
+    return pd.DataFrame({"date": dates, "value": dates.day})
+
+
+def test_sync(tmp_path) -> None:
+    store = SeriesStore(tmp_path)
+    df = sync(get_series, "600519", "2023-01-01", overlap=2, store=store)
+    assert sync(get_series, "600519", "2023-01-01", overlap=2, store=store).equals(df)
+    assert requests == ["2023-01-01", "2023-01-08"]
+    assert df["date"].is_unique
+
+
+def get_adjusted_series(
+    stock_code: str, start_date: str, adjust_backward_date: str
+) -> pd.DataFrame:
+    dates = pd.date_range(start_date, "2023-01-10")
+    return pd.DataFrame({"date": dates, "anchor": adjust_backward_date})
+
+
+def test_sync_key_by_kwargs(tmp_path) -> None:
+    store = SeriesStore(tmp_path)
+    for anchor in ("2023-01-01", "2023-01-05"):
+        df = sync(
+            get_adjusted_series,
+            "600519",
+            "2023-01-01",
+            store=store,
+            adjust_backward_date=anchor,
+        )
+        assert (df["anchor"] == anchor).all()
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
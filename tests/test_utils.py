@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+from requests import Response
+
+from lixinger import ratelimit
+from lixinger.api.cn.company.candlestick import Output
+from lixinger.config import settings
+from lixinger.ratelimit import RateLimiter, RateLimitError
+from lixinger.utils import (
+    camel_case_to_snake_case,
+    compact_df,
+    get_output_dtypes,
+    get_response_data,
+    get_response_df,
+)
+
+
+def make_response(data: list[dict[str, any]]) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = json.dumps({"code": 1, "data": data}).encode()
+    return response
+
+
+def test_get_response_df() -> None:
+    df = get_response_df(
+        make_response(
+            [
+                {"date": "2021-01-04T00:00:00+08:00", "close": 1, "volume": 100},
+                {"date": "2021-01-05T00:00:00+08:00", "close": 2, "volume": None},
+            ]
+        ),
+        Output,
+    )
+    assert df["date"].tolist() == [
+        pd.Timestamp("2021-01-04"),
+        pd.Timestamp("2021-01-05"),
+    ]
+    assert df["close"].dtype == "float64"
+    assert df["volume"].dtype == "float64"
+    assert set(df.columns) == set(Output.to_schema().columns)
+
+
+def test_compact_df() -> None:
+    df = pd.DataFrame(
+        {
+            "stock_code": ["600519", "600519", "000001", "000001"],
+            "close": [1.5, 2.5, 3.5, 4.5],
+            "volume": [1.0, None, 3.0, 4.0],
+            "name": ["a", "b", "c", "d"],
+        }
+    )
+    compacted = compact_df(df, Output, float32=True)
+    assert compacted["stock_code"].dtype == "category"
+    assert compacted["close"].dtype == "float32"
+    assert compacted["volume"].dtype == "Int64"
+    assert compacted["volume"].isna().sum() == 1
+    assert compacted["name"].dtype == object
+    assert compacted.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+
+def test_get_response_data_rate_limit_code(monkeypatch) -> None:
+    rate_limiter = RateLimiter(10)
+    monkeypatch.setattr(ratelimit, "_rate_limiter", rate_limiter)
+    monkeypatch.setattr(settings, "rate_limit_codes", [429])
+    response = Response()
+    response._content = b'{"code": 429, "error": "too many requests"}'
+    with pytest.raises(RateLimitError):
+        get_response_data(response)
+    assert rate_limiter._state["rate"] == 5
+
+    response._content = b'{"code": 0, "error": "bad request"}'
+    with pytest.raises(ValueError):
+        get_response_data(response)
+
+
+def test_memoized_helpers() -> None:
+    assert get_output_dtypes(Output) is get_output_dtypes(Output)
+    assert get_output_dtypes(Output)["date"] == "datetime64[ns]"
+
+    hits = camel_case_to_snake_case.cache_info().hits
+    assert camel_case_to_snake_case("stockCode") == "stock_code"
+    assert camel_case_to_snake_case("stockCode") == "stock_code"
+    assert camel_case_to_snake_case.cache_info().hits > hits